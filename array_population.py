@@ -0,0 +1,607 @@
+import json
+import math
+import numpy as np
+from dots import *
+from collision import swept_collider
+from distance_field import distance_field
+from selection import STRATEGIES
+from config import Config, new_seed
+from profiling import NULL_TIMER
+
+ANGLES = np.radians(np.arange(360))
+
+
+def bernoulli_sites(rng, size, p):
+    # Sorted indices where a size-long run of Bernoulli(p) trials succeeds, drawn as
+    # geometric gaps between successes instead of one random number per trial
+    if p <= 0:
+        return np.empty(0, dtype=np.intp)
+    sites = []
+    last = -1
+    while last < size:
+        gaps = rng.geometric(p, size=int((size - last) * p * 1.1) + 16)
+        positions = last + np.cumsum(gaps)
+        sites.append(positions[positions < size])
+        last = positions[-1]
+    return np.concatenate(sites)
+
+
+def direction_table(vel):
+    # Every direction is Dot.VEL rotated by an integer angle in range(360)
+    return vel * np.column_stack((np.cos(ANGLES), np.sin(ANGLES)))
+
+
+class ArrayPopulation:
+    """Population whose dots are stored as rows of NumPy arrays.
+
+    Drop-in replacement for dots.Population: all alive dots advance one step
+    per update() call using array operations instead of per-Dot Python code.
+    """
+    LIVE_COLOR = 'green'
+    DEAD_COLOR = 'gray'
+    ELITES_COLOR = 'blue'
+    INITIAL_CAPACITY = 64
+    CUTOFF_INTERVAL = 10  # Steps between bound_cutoff checks
+    BLOCK_SIZE = 1 << 15  # Dot steps evaluate() plays out per array pass
+    SWEPT_COLUMNS = 4  # Steps per exact swept test, dots that died are not tested further
+    BREED_BLOCK = 1 << 20  # Genes per block of offspring built at once
+    timer = NULL_TIMER  # Replace with a profiling.PhaseTimer to time each phase
+    pool = None  # Set to a parallel.EvaluationPool to split evaluate() across worker processes
+
+    def __init__(self, goal, size, config=None, seed=None, start=POSITION, world_size=(WIDTH, HEIGHT)):
+        self.goal = goal
+        self.size = size
+        self.start = start
+        self.world_size = world_size
+        self.config = Config(population=size) if config is None else config
+        self.seed = new_seed() if seed is None else seed
+        self.rng = np.random.default_rng(self.seed)  # Every random draw of this population
+        self.directions = direction_table(self.config.dots_xvel)
+        self.positions = np.empty((size, 2))
+        # Chromosomes are angle indices into self.directions, one row per dot
+        self.chromosomes = self.__random_angles(size, self.INITIAL_CAPACITY)
+        self.lengths = np.zeros(size, dtype=np.intp)  # Genes per dot, like len(Dot.directions)
+        self.moves = np.zeros(size, dtype=np.intp)  # Steps taken, like Dot.move_idx
+        self.alive_mask = np.ones(size, dtype=bool)
+        self.elites = np.empty(0, dtype=np.intp)
+        self.generation = 0  # Generations completed
+        self.step = 0
+        self.step_cap = None  # From the previous best dot when config.step_cap_factor is set
+        self.__alive = size
+        self.__stopped = False
+        self.__fitness = None
+        # What evaluate() already knows about each genome in the layout of the previous generation:
+        # leading steps that cannot collide, and the moves and end position of genomes that died
+        self.__safe_steps = np.zeros(size, dtype=np.intp)
+        self.__fate_moves = np.full(size, -1, dtype=np.intp)
+        self.__fate_positions = np.empty((size, 2))
+        self.__cache_layout = None
+        self.__obstacles = None  # Layout of the latest update, for geodesic fitness
+        # Steady-state mode: the best genomes evaluated so far, best first, and the
+        # fitness and moves of the dots scored since the last generation ended
+        self.pool_chromosomes = np.empty((0, self.INITIAL_CAPACITY), dtype=np.uint16)
+        self.pool_fitness = np.empty(0)
+        self.pool_moves = np.empty(0, dtype=np.intp)
+        self.__scored = []
+        self.__births = 0
+
+        self.__reset()
+
+    def __random_angles(self, n, moves):
+        return self.rng.integers(360, size=(n, moves), dtype=np.uint16)
+
+    def __reset(self):
+        self.positions[:] = self.start
+        self.moves[:] = 0
+        self.alive_mask[:] = True
+        self.step = 0
+        self.__alive = self.size
+        self.__stopped = False
+        self.__fitness = None
+        self.__layout = None  # Set by evaluate() when it plays out a whole generation
+
+    def __empty_chromosomes(self, capacity):
+        # An EvaluationPool keeps them in shared memory, where its workers read them
+        if self.pool is None:
+            return np.empty((self.size, capacity), dtype=np.uint16)
+        return self.pool.empty((self.size, capacity), np.uint16)
+
+    def __grow(self):
+        capacity = self.chromosomes.shape[1]
+        chromosomes = self.__empty_chromosomes(2 * capacity)
+        chromosomes[:, :capacity] = self.chromosomes
+        chromosomes[:, capacity:] = self.__random_angles(self.size, capacity)
+        self.chromosomes = chromosomes
+        # Pool genes past a genome's moves are never inherited, so they need no random draws
+        self.pool_chromosomes = np.pad(self.pool_chromosomes, ((0, 0), (0, capacity)))
+
+    def update(self, obstacles):
+        if self.config.steady_state:
+            return self.__steady_update(obstacles)
+
+        self.timer.start()
+        self.__layout = None
+        self.__obstacles = obstacles
+        alive_idx = np.flatnonzero(self.alive_mask)
+        alive = len(alive_idx)
+
+        if self.step >= self.chromosomes.shape[1]:
+            self.__grow()
+
+        # All alive dots share the same move index, so one column moves them all
+        starts = self.positions[alive_idx]
+        positions = starts + self.directions[self.chromosomes[alive_idx, self.step]]
+        self.step += 1
+        self.moves[alive_idx] = self.step
+        np.maximum(self.lengths, self.moves, out=self.lengths)
+        self.timer.lap('movement')
+
+        dead = self.__collide(obstacles, starts, positions)
+
+        self.positions[alive_idx] = positions
+        self.alive_mask[alive_idx[dead]] = False
+        self.__alive = alive
+        self.__fitness = None
+        self.timer.lap('collision')
+
+        if self.step_cap is not None and self.step >= self.step_cap:
+            self.__stopped = True
+        elif self.config.bound_cutoff and self.step % self.CUTOFF_INTERVAL == 0:
+            self.__stopped = self.__ranking_settled()
+        self.timer.lap('termination')
+
+        return alive
+
+    def __collide(self, obstacles, starts, positions):
+        # Kill dots on going out of window's boundary or colliding with an obstacle
+        if self.config.swept_collision:
+            # Dots stop where they first touch an obstacle or the goal
+            collider = swept_collider(obstacles, self.world_size, DOTS_RADIUS, self.config.dots_xvel)
+            contact = collider.first_contact(starts, positions)
+            hit = contact <= 1
+            positions[hit] = starts[hit] + contact[hit, None] * (positions[hit] - starts[hit])
+            return hit | collider.out_of_bounds(positions)
+        return collision_grid(obstacles, self.world_size).collides(positions)
+
+    def __steady_update(self, obstacles):
+        # Every dot moves every step at its own age; dots that die are scored and replaced at once
+        self.timer.start()
+        self.__obstacles = obstacles
+        if self.moves.max() >= self.chromosomes.shape[1]:
+            self.__grow()
+
+        starts = self.positions
+        positions = starts + self.directions[self.chromosomes[np.arange(self.size), self.moves]]
+        self.moves += 1
+        self.step += 1
+        np.maximum(self.lengths, self.moves, out=self.lengths)
+        self.timer.lap('movement')
+
+        dead = self.__collide(obstacles, starts, positions)
+        self.positions = positions
+        self.__fitness = None
+        self.timer.lap('collision')
+
+        # Dots reaching the age cap are scored where they are, like a stopped generation
+        if self.step_cap is not None:
+            dead |= self.moves >= self.step_cap
+        self.timer.lap('termination')
+
+        dead = np.flatnonzero(dead)
+        if len(dead):
+            self.__replace(dead)
+        return self.size
+
+    def __replace(self, dead):
+        fitness = self.__score(self.positions[dead], self.moves[dead])
+        self.__scored.append((fitness, self.moves[dead].copy()))
+        self.__births += len(dead)
+        self.timer.lap('fitness')
+
+        # The pool keeps the best genomes evaluated so far, so it is elitist by itself
+        pool_fitness = np.concatenate((self.pool_fitness, fitness))
+        best = self.select_best_dots(self.config.mating_pool_size, pool_fitness)
+        self.pool_chromosomes = np.concatenate((self.pool_chromosomes, self.chromosomes[dead]))[best]
+        self.pool_moves = np.concatenate((self.pool_moves, self.moves[dead]))[best]
+        self.pool_fitness = pool_fitness[best]
+        if self.config.step_cap_factor is not None:
+            self.step_cap = math.ceil(self.config.step_cap_factor * self.pool_moves[0])
+        self.timer.lap('selection')
+
+        n_pairs = (len(dead) + 1) // 2
+        select = STRATEGIES[self.config.selection]
+        parents = select(self.pool_fitness, np.arange(len(best)), 2 * n_pairs, self.rng, self.config)
+        children = np.empty((len(dead), self.chromosomes.shape[1]), dtype=np.uint16)
+        lengths, _ = self.__breed(self.pool_chromosomes, self.pool_moves, parents.reshape(n_pairs, 2), children)
+        self.chromosomes[dead] = children
+        self.lengths[dead] = lengths
+        self.positions[dead] = self.start
+        self.moves[dead] = 0
+        self.timer.lap('mutation')
+
+    def evaluate(self, obstacles):
+        """Play out the rest of the generation, with the same result as calling update() until alive() is False.
+
+        Paths are built about BLOCK_SIZE dot moves at a time with a cumulative sum and
+        each dot's first colliding step is found in one pass over the block.
+        Elites that died last generation die the same way again, and steps
+        known to be collision free (an offspring's unmutated prefix shared
+        with its head parent) are not tested.
+        """
+        if self.config.steady_state:
+            while self.alive():
+                self.update(obstacles)
+            return
+
+        self.timer.start()
+        self.__obstacles = obstacles
+        layout = tuple(tuple(obstacle.rect) for obstacle in obstacles)
+        cached = self.__cache_layout == layout
+        if self.step == 0:
+            self.__layout = layout
+
+        idx = np.flatnonzero(self.alive_mask)
+        cap = self.step_cap
+        if cached and self.step == 0 and not self.config.bound_cutoff:
+            known = self.__fate_moves[idx] >= 0
+            if cap is not None:
+                known &= self.__fate_moves[idx] <= cap
+            replayed = idx[known]
+            self.moves[replayed] = self.__fate_moves[replayed]
+            self.positions[replayed] = self.__fate_positions[replayed]
+            self.alive_mask[replayed] = False
+            idx = idx[~known]
+        safe = self.__safe_steps if cached else np.zeros(self.size, dtype=np.intp)
+        self.timer.lap('movement')
+
+        while len(idx) and not self.__stopped:
+            if self.step >= self.chromosomes.shape[1]:
+                self.__grow()
+            stop = self.chromosomes.shape[1]
+            if cap is not None:
+                stop = min(stop, cap)
+            if self.config.bound_cutoff:
+                stop = min(stop, self.step + self.CUTOFF_INTERVAL - self.step % self.CUTOFF_INTERVAL)
+            if self.pool is None:
+                idx = self.play_out(idx, stop, obstacles, safe)
+            else:
+                idx = self.pool.play_out(self, idx, stop, obstacles, safe)
+            self.step = stop
+            self.__fitness = None
+
+            if len(idx) and cap is not None and self.step >= cap:
+                self.__stopped = True
+            elif len(idx) and self.config.bound_cutoff and self.step % self.CUTOFF_INTERVAL == 0:
+                self.__stopped = self.__ranking_settled()
+            self.timer.lap('termination')
+
+        # update() takes one more, empty step after the last dot dies, and may grow the chromosomes
+        # there; matching it keeps the random genes, and so the whole run, identical
+        if self.__stopped:
+            last_update = self.step - 1
+        else:
+            last_update = int(self.moves.max())
+            if cap is not None:
+                last_update = min(last_update, cap - 1)
+        while self.chromosomes.shape[1] <= last_update:
+            self.__grow()
+        self.step = last_update + 1
+        np.maximum(self.lengths, self.moves, out=self.lengths)
+        self.__alive = int(np.count_nonzero(self.alive_mask))
+        self.__fitness = None
+        self.timer.lap('movement')
+
+    def play_out(self, idx, stop, obstacles, safe):
+        """Advance the dots idx from self.step until they die or reach step stop, and return the survivors.
+
+        The chromosomes must already hold stop genes. Dots are independent here,
+        so parallel.EvaluationPool runs this on slices of idx in worker processes.
+        """
+        swept = self.config.swept_collision
+        if swept:
+            collider = swept_collider(obstacles, self.world_size, DOTS_RADIUS, self.config.dots_xvel)
+        else:
+            grid = collision_grid(obstacles, self.world_size)
+
+        step = self.step
+        while len(idx) and step < stop:
+            # Blocks get longer as dots die, so a few long-lived dots cost few passes
+            k = min(max(self.BLOCK_SIZE // len(idx), 8), stop - step)
+
+            # Starting the sum from the current position adds moves in the same order as update()
+            path = np.concatenate((self.positions[idx, None],
+                                   self.directions[self.chromosomes[idx, step:step + k]]), axis=1)
+            np.cumsum(path, axis=1, out=path)
+            ends = path[:, 1:]
+            self.timer.lap('movement')
+
+            test = step + 1 + np.arange(k) > safe[idx, None]
+            hit = np.zeros((len(idx), k), dtype=bool)
+            if swept:
+                contact = np.full((len(idx), k), np.inf)
+                pending = np.arange(len(idx))
+                for column in range(0, k, self.SWEPT_COLUMNS):
+                    cells = np.ix_(pending, np.arange(column, min(column + self.SWEPT_COLUMNS, k)))
+                    tested = test[cells]
+                    starts, stops = path[:, :-1][cells][tested], ends[cells][tested]
+                    part_contact = np.full(tested.shape, np.inf)
+                    part_contact[tested] = collider.first_contact(starts, stops)
+                    part_hit = np.zeros(tested.shape, dtype=bool)
+                    part_hit[tested] = (part_contact[tested] <= 1) | collider.out_of_bounds(stops)
+                    contact[cells] = part_contact
+                    hit[cells] = part_hit
+                    pending = pending[~part_hit.any(axis=1)]
+            else:
+                hit[test] = grid.collides(ends[test])
+
+            died = hit.any(axis=1)
+            last = np.where(died, hit.argmax(axis=1), k - 1)
+            rows = np.arange(len(idx))
+            positions = ends[rows, last]
+            if swept:
+                # Dots stop where they first touch an obstacle or the goal
+                touched = np.isfinite(contact[rows, last]) & (contact[rows, last] <= 1)
+                starts = path[rows, last][touched]
+                positions[touched] = starts + contact[rows, last][touched, None] * (positions[touched] - starts)
+
+            self.positions[idx] = positions
+            self.moves[idx] = step + last + 1
+            self.alive_mask[idx[died]] = False
+            idx = idx[~died]
+            step += k
+            self.timer.lap('collision')
+        return idx
+
+    def __ranking_settled(self):
+        # True once the mating pool is fixed: enough dead dots beat the best
+        # fitness any alive dot could still reach by heading straight to the goal
+        fitness = self.get_fitness()
+        final = fitness[~self.alive_mask]
+        n = self.config.mating_pool_size
+        if len(final) < n or not self.alive_mask.any():
+            return False
+
+        distance_to_goal = np.linalg.norm(self.positions[self.alive_mask] - self.goal.rect.center, axis=1)
+        steps_to_goal = np.maximum(np.ceil((distance_to_goal - GOAL_RADIUS - DOTS_RADIUS) / self.config.dots_xvel), 0)
+        best_reachable = GOAL_REWARD + 1 / (self.step + steps_to_goal.min())
+        threshold = np.partition(final, len(final) - n)[len(final) - n]
+        return threshold > best_reachable
+
+    def alive(self):
+        # Dots still moving when a termination policy stops the generation are scored where they are
+        if self.config.steady_state:
+            return self.__births < self.size  # A steady-state generation is size evaluations
+        return self.__alive > 0 and not self.__stopped
+
+    def draw(self, surface):
+        from render import draw_dots
+
+        others = np.ones(self.size, dtype=bool)
+        others[self.elites] = False
+
+        # Elites are drawn last so they stay visible on top
+        draw_dots(surface, self.positions[others & ~self.alive_mask], self.DEAD_COLOR)
+        draw_dots(surface, self.positions[others & self.alive_mask], self.LIVE_COLOR)
+        draw_dots(surface, self.positions[self.elites], self.ELITES_COLOR)
+
+    def __score(self, positions, moves):
+        distance_to_goal = np.linalg.norm(positions - self.goal.rect.center, axis=1)
+        distance = distance_to_goal
+        if self.config.fitness == 'geodesic' and self.__obstacles is not None:
+            distance = distance_field(self.__obstacles, self.goal, self.world_size).lookup(positions)
+        distance_score = np.where(distance_to_goal <= GOAL_RADIUS + DOTS_RADIUS,
+                                  GOAL_REWARD, -distance)
+        return distance_score + 1 / moves
+
+    def get_fitness(self):
+        # In steady-state mode, the dots scored since the last generation
+        if self.config.steady_state:
+            return np.concatenate([fitness for fitness, _ in self.__scored] or [np.empty(0)])
+
+        # Cached until the population moves or resets, like Dot.get_fitness
+        if self.__fitness is None:
+            self.__fitness = self.__score(self.positions, self.moves)
+        return self.__fitness
+
+    def get_moves(self):
+        if self.config.steady_state:
+            return np.concatenate([moves for _, moves in self.__scored] or [np.empty(0, dtype=np.intp)])
+        return self.moves
+
+    def select_best_dots(self, n, fitness=None):
+        if fitness is None:
+            fitness = self.get_fitness()
+
+        # Partial top-n selection, only the mating pool needs to be ordered
+        if n < len(fitness):
+            best = np.argpartition(-fitness, n - 1)[:n]
+        else:
+            best = np.arange(len(fitness))
+        return best[np.argsort(-fitness[best], kind='stable')]
+
+    def __breed(self, chromosomes, moves, parents, out):
+        # Fills out with offspring of parent pairs given as rows of chromosomes, and returns their
+        # lengths and the leading moves they share with their head parent
+        n, capacity = out.shape
+        genes = np.arange(capacity)
+        points = (self.rng.random(len(parents)) * moves[parents].min(axis=1)).astype(np.intp)
+
+        # Each pair yields (parent1 head + parent2 tail) and (parent2 head + parent1 tail)
+        heads = parents.ravel()[:n]
+        tails = parents[:, ::-1].ravel()[:n]
+        points = np.repeat(points, 2)[:n]
+        lengths = moves[tails]
+        first_change = lengths.copy()
+
+        # A block of rows at a time, so no temporary is the size of the whole matrix
+        rows = max(self.BREED_BLOCK // capacity, 1)
+        for begin in range(0, n, rows):
+            end = min(begin + rows, n)
+            children = out[begin:end]
+            np.take(chromosomes, tails[begin:end], axis=0, out=children, mode='clip')
+            prefix = int(points[begin:end].max(initial=0))
+            np.copyto(children[:, :prefix], chromosomes[heads[begin:end], :prefix],
+                      where=genes[:prefix] < points[begin:end, None])
+            self.timer.lap('crossover')
+
+            # Genes past the inherited length get random angles, and mutated genes before it too
+            past = genes >= lengths[begin:end, None]
+            children[past] = self.rng.integers(360, size=np.count_nonzero(past), dtype=np.uint16)
+            row, gene = np.divmod(bernoulli_sites(self.rng, (end - begin) * capacity, self.config.mutation_prob),
+                                  capacity)
+            inherited = gene < lengths[begin + row]
+            row, gene = row[inherited], gene[inherited]
+            children[row, gene] = self.rng.integers(360, size=len(row), dtype=np.uint16)
+            # Sites come out in order, so a row's first site is its first mutation
+            mutated, first = np.unique(row, return_index=True)
+            first_change[begin + mutated] = gene[first]
+            self.timer.lap('mutation')
+
+        return lengths, np.minimum(points, first_change)
+
+    def generate_next_generation(self):
+        if self.config.steady_state:
+            return self.__steady_generation()
+
+        self.timer.start()
+        fitness = self.get_fitness()
+        self.timer.lap('fitness')
+        best_dots = self.select_best_dots(self.config.mating_pool_size, fitness)
+        best_dot = best_dots[0]
+        best_dot_moves = int(self.moves[best_dot])
+        reached_goal_dots = int(np.count_nonzero(fitness >= GOAL_REWARD))
+        elites = best_dots[:self.config.elitism]
+
+        if self.config.step_cap_factor is not None:
+            self.step_cap = math.ceil(self.config.step_cap_factor * best_dot_moves)
+        self.timer.lap('selection')
+
+        n_offspring = self.size - self.config.elitism
+        n_pairs = (n_offspring + 1) // 2
+
+        # Draw every parent pair and crossover point for the generation at once
+        select = STRATEGIES[self.config.selection]
+        parents = select(fitness, best_dots, 2 * n_pairs, self.rng, self.config).reshape(n_pairs, 2)
+        chromosomes = self.__empty_chromosomes(self.chromosomes.shape[1])
+        lengths = np.empty(self.size, dtype=np.intp)
+        safe_steps = np.empty(self.size, dtype=np.intp)
+        # Offspring follow their head parent's collision-free path up to the crossover point or first mutation
+        lengths[:n_offspring], safe_steps[:n_offspring] = \
+            self.__breed(self.chromosomes, self.moves, parents, chromosomes[:n_offspring])
+
+        # Elites are kept unchanged at the end, as in dots.Population
+        chromosomes[n_offspring:] = self.chromosomes[elites]
+        lengths[n_offspring:] = self.lengths[elites]
+
+        # Elites that died will die the same way again; stopped ones are only known up to where they stopped
+        dead = ~self.alive_mask[elites]
+        safe_steps[n_offspring:] = self.moves[elites] - dead
+        fate_moves = np.full(self.size, -1, dtype=np.intp)
+        fate_moves[n_offspring:] = np.where(dead, self.moves[elites], -1)
+        fate_positions = np.empty((self.size, 2))
+        fate_positions[n_offspring:] = self.positions[elites]
+
+        best = Dot(array('H', self.chromosomes[best_dot, :self.lengths[best_dot]].tobytes()))
+        best.move_idx = best_dot_moves
+
+        self.chromosomes = chromosomes
+        self.lengths = lengths
+        self.elites = np.arange(n_offspring, self.size)
+        self.__safe_steps = safe_steps
+        self.__fate_moves = fate_moves
+        self.__fate_positions = fate_positions
+        self.__cache_layout = self.__layout
+        self.generation += 1
+        self.__reset()
+        self.timer.lap('mutation')
+
+        return best, best_dot_moves, reached_goal_dots
+
+    def __steady_generation(self):
+        # Only the bookkeeping ends here, the dots keep moving across generations
+        best_moves = int(self.pool_moves[0])
+        best = Dot(array('H', self.pool_chromosomes[0, :best_moves].tobytes()))
+        best.move_idx = best_moves
+        reached_goal_dots = int(np.count_nonzero(self.get_fitness() >= GOAL_REWARD))
+
+        self.__scored = []
+        self.__births = 0
+        self.step = 0
+        self.generation += 1
+        return best, best_moves, reached_goal_dots
+
+    def emigrants(self, n):
+        # Best elites first; only valid between generations
+        best = self.elites[:n]
+        return self.chromosomes[best].copy(), self.lengths[best].copy()
+
+    def immigrate(self, chromosomes, lengths, start=0):
+        # Immigrants replace offspring rows from start on, elites at the end are kept.
+        # Genes past an immigrant's capacity stay this population's random genes.
+        while chromosomes.shape[1] > self.chromosomes.shape[1]:
+            self.__grow()
+
+        rows = slice(start, start + len(lengths))
+        self.chromosomes[rows, :chromosomes.shape[1]] = chromosomes
+        self.lengths[rows] = lengths
+        self.__safe_steps[rows] = 0
+        self.__fate_moves[rows] = -1
+
+    def checkpoint(self):
+        """Arrays needed to resume this population exactly, copied so they can be written later.
+
+        Only valid between generations, when every dot is back at its start
+        (steady-state dots are saved where they are).
+        The full chromosome capacity is kept because the genes past each
+        dot's length are the random moves it will take next.
+        """
+        arrays = {
+            'chromosomes': self.chromosomes.copy(),
+            'lengths': self.lengths.astype(np.uint32),
+            'elites': self.elites.astype(np.uint32),
+            'generation': np.array(self.generation),
+            'step_cap': np.array(-1 if self.step_cap is None else self.step_cap),
+            'goal': np.array(self.goal.rect),
+            'start': np.array(self.start),
+            'world_size': np.array(self.world_size),
+            'config': np.array(json.dumps(vars(self.config))),
+            'seed': np.array(str(self.seed)),
+            'rng_state': np.array(json.dumps(self.rng.bit_generator.state)),
+        }
+        if self.config.steady_state:
+            # Steady-state dots are mid-flight at every generation boundary
+            arrays.update(positions=self.positions.copy(), moves=self.moves.astype(np.uint32),
+                          pool_chromosomes=self.pool_chromosomes.copy(), pool_fitness=self.pool_fitness.copy(),
+                          pool_moves=self.pool_moves.astype(np.uint32))
+        return arrays
+
+    def save(self, file):
+        # Uncompressed .npz: just the raw arrays, no per-object pickling
+        with open(file, 'wb') as f:
+            np.savez(f, **self.checkpoint())
+
+    @classmethod
+    def load(cls, file):
+        with np.load(file) as data:
+            config = Config(**json.loads(str(data['config'])))
+            goal = Goal(*data['goal'], pos='left')
+            # Checkpoints from before scenario files use the constants.py world
+            start = tuple(data['start'].tolist()) if 'start' in data else POSITION
+            world_size = tuple(data['world_size'].tolist()) if 'world_size' in data else (WIDTH, HEIGHT)
+            population = cls(goal, config.population, config, int(data['seed']), start, world_size)
+            population.rng.bit_generator.state = json.loads(str(data['rng_state']))
+            population.chromosomes = data['chromosomes']
+            population.lengths = data['lengths'].astype(np.intp)
+            population.elites = data['elites'].astype(np.intp)
+            population.generation = int(data['generation'])
+            if data['step_cap'] >= 0:
+                population.step_cap = int(data['step_cap'])
+            if config.steady_state:
+                population.positions = data['positions']
+                population.moves = data['moves'].astype(np.intp)
+                population.pool_chromosomes = data['pool_chromosomes']
+                population.pool_fitness = data['pool_fitness']
+                population.pool_moves = data['pool_moves'].astype(np.intp)
+
+        return population
+
@@ -0,0 +1,137 @@
+import json
+import math
+import re
+import time
+import numpy as np
+import obstacles as layouts
+from array_population import *
+
+SIZES = (500, 5000, 50000)
+LAYOUTS = sorted((name for name in dir(layouts) if name.startswith('OBSTACLES')),
+                 key=lambda name: [int(part) if part.isdigit() else part for part in re.split(r'(\d+)', name)])
+MIN_RUN_SECONDS = 0.2  # Shorter timed runs are repeated until they last this long
+METRICS = ('steps_per_sec', 'dot_steps_per_sec', 'generations_per_sec', 'collision_checks_per_sec')
+
+
+def make_bench_population(engine, size, seed):
+    if engine == 'dots':
+        return Population(GOAL, size, seed)
+
+    # Keep the constants.py ratio of mating pool to population at every size
+    config = Config(population=size, mating_pool_size=max(size // 10, ELITISM))
+    return ArrayPopulation(GOAL, size, config, seed)
+
+
+def bench_collision(engine, obstacles, size, rng, repeats=20):
+    grid = collision_grid(obstacles)
+    positions = rng.uniform((-10, -10), (WIDTH + 10, HEIGHT + 10), (size, 2))
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        if engine == 'dots':
+            for x, y in positions.tolist():
+                grid.collides_point(x, y)
+        else:
+            grid.collides(positions)
+    return size * repeats / (time.perf_counter() - start)
+
+
+def time_generations(engine, obstacles, size, generations, max_steps, seed):
+    population = make_bench_population(engine, size, seed)
+    steps = dot_steps = 0
+    update_seconds = reproduction_seconds = 0
+
+    for _ in range(generations):
+        start = time.perf_counter()
+        if engine == 'dots':
+            for _ in range(max_steps):
+                if not population.alive():
+                    break
+                dot_steps += population.update(obstacles)
+                steps += 1
+        else:
+            # The same evaluate() headless runs use, cut off at max_steps
+            population.step_cap = max_steps
+            population.evaluate(obstacles)
+            steps += population.step
+            dot_steps += int(population.moves.sum())
+        update_seconds += time.perf_counter() - start
+
+        start = time.perf_counter()
+        population.generate_next_generation()
+        reproduction_seconds += time.perf_counter() - start
+
+    return steps, dot_steps, update_seconds, reproduction_seconds
+
+
+def bench_workload(engine, layout, size, generations=3, max_steps=300, seed=0, repeats=3):
+    """Time a fixed-seed workload and return its throughput figures.
+
+    Each generation runs until every dot dies or max_steps is reached, so
+    large populations on open layouts finish in bounded time. An untimed
+    run warms caches first; like timeit, short workloads are looped until a
+    timed run lasts MIN_RUN_SECONDS, and each figure is the best of repeats
+    runs, which keeps noise under the default regression tolerance.
+    """
+    obstacles = list(getattr(layouts, layout))
+    if GOAL not in obstacles:
+        obstacles.append(GOAL)
+
+    warmup = time_generations(engine, obstacles, size, generations, max_steps, seed)
+    loops = math.ceil(MIN_RUN_SECONDS / (warmup[2] + warmup[3]))
+    runs = []
+    for _ in range(repeats):
+        totals = [time_generations(engine, obstacles, size, generations, max_steps, seed) for _ in range(loops)]
+        runs.append([sum(values) for values in zip(*totals)])
+
+    rng = np.random.default_rng(seed)
+    start = time.perf_counter()
+    bench_collision(engine, obstacles, size, rng, 1)
+    collision_repeats = math.ceil(MIN_RUN_SECONDS / (time.perf_counter() - start))
+
+    return {
+        'steps_per_sec': max(steps / update for steps, _, update, _ in runs),
+        'dot_steps_per_sec': max(dot_steps / update for _, dot_steps, update, _ in runs),
+        'generations_per_sec': max(loops * generations / (update + reproduction) for _, _, update, reproduction in runs),
+        'collision_checks_per_sec': max(bench_collision(engine, obstacles, size, rng, collision_repeats)
+                                        for _ in range(repeats)),
+    }
+
+
+def run_benchmarks(engine='array', sizes=SIZES, layout_names=LAYOUTS, generations=3, max_steps=300, seed=0,
+                   repeats=3):
+    results = {}
+    for size in sizes:
+        for layout in layout_names:
+            key = f'{engine}/{layout}/{size}'
+            results[key] = bench_workload(engine, layout, size, generations, max_steps, seed, repeats)
+            print(key, ' '.join(f'{metric}={results[key][metric]:.4g}' for metric in METRICS))
+    return results
+
+
+def compare(results, baseline, tolerance=0.1):
+    """Print each metric relative to the baseline and return the regressions.
+
+    Every metric is a rate, so a regression is a value more than tolerance
+    below the baseline's.
+    """
+    regressions = []
+    for key, figures in results.items():
+        if key not in baseline:
+            continue
+        for metric in METRICS:
+            ratio = figures[metric] / baseline[key][metric]
+            if ratio < 1 - tolerance:
+                regressions.append((key, metric, ratio))
+            print(key, metric, f'{ratio:.2f}x baseline')
+    return regressions
+
+
+def load_results(file):
+    with open(file) as f:
+        return json.load(f)
+
+
+def save_results(results, file):
+    with open(file, 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
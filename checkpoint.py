@@ -0,0 +1,83 @@
+import os
+import queue
+import threading
+from contextlib import contextmanager
+import numpy as np
+
+
+@contextmanager
+def atomic_write(file):
+    """Binary file object whose contents replace file only once fully written.
+
+    Written next to the target and renamed, so readers and crashed runs
+    never see half a file.
+    """
+    tmp_file = file + '.tmp'
+    with open(tmp_file, 'wb') as f:
+        yield f
+    os.replace(tmp_file, file)
+
+
+class CheckpointWriter:
+    """Keeps a single, atomically replaced checkpoint of an ArrayPopulation.
+
+    save() only copies the population's arrays; writing them to disk happens
+    on a background thread unless background is False.
+    """
+    def __init__(self, file, background=True):
+        self.file = file
+        self.__pending = queue.Queue()
+        self.__writer = None
+        self.__error = None
+
+        if background:
+            self.__writer = threading.Thread(target=self.__write_pending, daemon=True)
+            self.__writer.start()
+
+    def __write(self, arrays):
+        with atomic_write(self.file) as f:
+            np.savez(f, **arrays)
+
+    def __write_pending(self):
+        try:
+            while (arrays := self.__pending.get()) is not None:
+                self.__write(arrays)
+        except Exception as e:
+            # Kept for save() and close() to raise in the GA loop's thread
+            self.__error = e
+
+    def __raise_error(self):
+        if self.__error is not None:
+            raise self.__error
+
+    def save(self, population, generation=None):
+        # The generation number is stored in the checkpoint itself
+        self.__raise_error()
+        if self.__writer:
+            self.__pending.put(population.checkpoint())
+        else:
+            self.__write(population.checkpoint())
+
+    def close(self):
+        if self.__writer:
+            self.__pending.put(None)
+            self.__writer.join()
+            self.__raise_error()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class PickleCheckpoints:
+    """Numbered full-object pickles, for the per-Dot Population."""
+    def __init__(self, file_prefix):
+        self.file_prefix = file_prefix
+
+    def save(self, population, generation):
+        population.save(f'{self.file_prefix}_{generation}')
+
+    def close(self):
+        pass
@@ -0,0 +1,137 @@
+import math
+import numpy as np
+from obstacles import *
+
+
+class CollisionGrid:
+    """Occupancy bitmap of an obstacle layout with one cell per pixel.
+
+    Cells are offset by one so the row/column on each side of the window is
+    blocked too, folding the out-of-bounds check into the same lookup. Points
+    are truncated to their pixel like Rect.collidepoint does.
+    """
+    def __init__(self, rects, world_size=(WIDTH, HEIGHT)):
+        self.rects = rects
+        self.world_size = world_size
+        size_x, size_y = world_size[0] + 2, world_size[1] + 2
+        self.blocked = np.zeros((size_x, size_y), dtype=bool)
+        self.blocked[[0, -1], :] = True
+        self.blocked[:, [0, -1]] = True
+
+        # Both ends are clamped: a negative end would count from the far side of the grid
+        for left, top, width, height in rects:
+            x0, x1 = min(max(left + 1, 0), size_x), min(max(left + width + 1, 0), size_x)
+            y0, y1 = min(max(top + 1, 0), size_y), min(max(top + height + 1, 0), size_y)
+            self.blocked[x0:x1, y0:y1] = True
+
+    def collides(self, positions):
+        width, height = self.world_size
+        cells = np.floor(positions).astype(np.intp) + 1
+        np.clip(cells[:, 0], 0, width + 1, out=cells[:, 0])
+        np.clip(cells[:, 1], 0, height + 1, out=cells[:, 1])
+        return self.blocked[cells[:, 0], cells[:, 1]]
+
+    def collides_point(self, x, y):
+        width, height = self.world_size
+        x = min(max(math.floor(x) + 1, 0), width + 1)
+        y = min(max(math.floor(y) + 1, 0), height + 1)
+        return self.blocked[x, y]
+
+
+_grids = {}
+
+
+def collision_grid(obstacles, world_size=(WIDTH, HEIGHT)):
+    # Keyed by the rectangles themselves so an edited layout gets a new grid
+    key = (tuple(tuple(obstacle.rect) for obstacle in obstacles), tuple(world_size))
+    grid = _grids.get(key)
+    if grid is None:
+        grid = _grids[key] = CollisionGrid(*key)
+    return grid
+
+
+def cache_grid(grid):
+    # Reuse a grid built elsewhere, e.g. one loaded from the scenario cache
+    _grids[(grid.rects, grid.world_size)] = grid
+
+
+class SweptCollider:
+    """First contact of moving round dots with an obstacle layout.
+
+    Each step is a segment from a dot's old to its new position. Obstacles
+    are rectangles grown by the dot radius with rounded corners, and the goal
+    is the circle Dot.get_fitness counts as reached, so a fast dot cannot step
+    over a thin wall and a dot touching the goal has reached it. Only dots
+    starting within reach of an obstacle, found with a grid like
+    CollisionGrid, are tested against every rectangle.
+    """
+    def __init__(self, rects, goals, world_size, radius, reach):
+        self.world_size = np.array(world_size)
+        rects = np.array(rects, dtype=float).reshape(-1, 4)
+        left, top = rects[:, 0], rects[:, 1]
+        right, bottom = left + rects[:, 2], top + rects[:, 3]
+
+        # A rounded rectangle is two rectangles grown along one axis each plus four corner circles
+        self.box_low = np.concatenate((np.column_stack((left - radius, top)),
+                                       np.column_stack((left, top - radius))))
+        self.box_high = np.concatenate((np.column_stack((right + radius, bottom)),
+                                        np.column_stack((right, bottom + radius))))
+        corners = [np.column_stack(corner) for corner in ((left, top), (right, top), (left, bottom), (right, bottom))]
+        goals = np.array(goals, dtype=float).reshape(-1, 4)
+        self.centers = np.concatenate(corners + [goals[:, :2] + goals[:, 2:] // 2])
+        # Slightly inside the reach radius so contact points still count as reached
+        goal_radius = (GOAL_RADIUS + radius) * (1 - 1e-9)
+        self.radii = np.concatenate((np.full(4 * len(rects), float(radius)), np.full(len(goals), goal_radius)))
+
+        margin = math.ceil(max(radius, goal_radius) + reach) + 1
+        near = [(x - margin, y - margin, w + 2 * margin, h + 2 * margin)
+                for x, y, w, h in np.concatenate((rects, goals)).astype(int).tolist()]
+        self.near = CollisionGrid(tuple(near), tuple(world_size))
+
+    def first_contact(self, starts, ends):
+        """Fraction of each step travelled before contact, np.inf for dots that miss."""
+        contact = np.full(len(starts), np.inf)
+        candidates = np.flatnonzero(self.near.collides(starts))
+        if len(candidates) == 0:
+            return contact
+
+        p = starts[candidates, None, :]
+        d = ends[candidates] - starts[candidates]
+        d[d == 0] = 1e-12  # Keeps the slab test free of 0 * inf
+
+        # Slab test: entry is the latest axis entry, exit the earliest axis exit
+        t1 = (self.box_low - p) / d[:, None, :]
+        t2 = (self.box_high - p) / d[:, None, :]
+        entry = np.maximum(np.minimum(t1, t2).max(axis=2), 0)
+        leave = np.minimum(np.maximum(t1, t2).min(axis=2), 1)
+        box_t = np.where(entry <= leave, entry, np.inf).min(axis=1, initial=np.inf)
+
+        # Circles: smallest root of |p + t d - c|^2 = r^2, or 0 when starting inside
+        offset = p - self.centers
+        a = (d * d).sum(axis=1)[:, None]
+        b = (offset * d[:, None, :]).sum(axis=2)
+        c = (offset * offset).sum(axis=2) - self.radii ** 2
+        disc = b * b - a * c
+        root = (-b - np.sqrt(np.maximum(disc, 0))) / a
+        circle_t = np.where(c <= 0, 0, np.where((disc >= 0) & (root >= 0) & (root <= 1), root, np.inf))
+        circle_t = circle_t.min(axis=1, initial=np.inf)
+
+        contact[candidates] = np.minimum(box_t, circle_t)
+        return contact
+
+    def out_of_bounds(self, positions):
+        # Same test as CollisionGrid's border cells: the centre has left [0, size)
+        return ((positions < 0) | (positions >= self.world_size)).any(axis=1)
+
+
+_colliders = {}
+
+
+def swept_collider(obstacles, world_size=(WIDTH, HEIGHT), radius=DOTS_RADIUS, reach=DOTS_XVEL):
+    rects = tuple(tuple(obstacle.rect) for obstacle in obstacles if not isinstance(obstacle, Goal))
+    goals = tuple(tuple(obstacle.rect) for obstacle in obstacles if isinstance(obstacle, Goal))
+    key = (rects, goals, tuple(world_size), radius, reach)
+    collider = _colliders.get(key)
+    if collider is None:
+        collider = _colliders[key] = SweptCollider(*key)
+    return collider
@@ -0,0 +1,92 @@
+import os
+import random
+import typing
+from dataclasses import dataclass, fields, replace
+from constants import *
+
+
+def new_seed():
+    # Unseeded runs still get a concrete seed so they can be recorded and replayed
+    return random.SystemRandom().getrandbits(63)
+
+
+def cache_dir():
+    # Derived data worth keeping between runs: parsed scenarios, distance fields
+    return os.environ.get('DOTS_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'dots'))
+
+
+FITNESS_MODES = ('euclidean', 'geodesic')
+SELECTIONS = ('truncation', 'tournament', 'sus', 'rank')
+
+
+@dataclass(frozen=True)
+class Config:
+    """GA hyperparameters for one run, defaulting to constants.py.
+
+    Passed to ArrayPopulation so several configurations can run side by side
+    without editing or patching the module-level constants.
+    """
+    population: int = POPULATION
+    mating_pool_size: int = MATING_POOL_SIZE
+    mutation_prob: float = MUTATION_PROB
+    elitism: int = ELITISM
+    dots_xvel: float = DOTS_XVEL
+    # Generation termination: stop stepping after step_cap_factor times the previous
+    # best dot's moves, and/or once no alive dot can still enter the mating pool
+    step_cap_factor: float | None = None
+    bound_cutoff: bool = False
+    # Test each step's whole path against obstacles grown by DOTS_RADIUS instead of
+    # its end point, so dots_xvel can be raised without dots tunnelling through walls
+    swept_collision: bool = False
+    # 'geodesic' scores dots by their path length to the goal around the obstacles
+    # instead of the straight line, so maze layouts stop trapping them under walls
+    fitness: str = 'euclidean'
+    # How parents are drawn, see selection.py. Truncation draws uniformly from the
+    # mating pool; the others draw from the whole population by fitness
+    selection: str = 'truncation'
+    tournament_size: int = 3
+    rank_pressure: float = 1.5  # Expected offspring of the best dot under rank selection
+    # Replace each dot with an offspring of the best genomes so far as soon as it dies,
+    # instead of waiting for the whole generation; a generation is then population deaths
+    steady_state: bool = False
+
+    def __post_init__(self):
+        # Types first, so `population = "500"` in a scenario is reported instead of failing a comparison
+        for field in fields(self):
+            value = getattr(self, field.name)
+            kinds = typing.get_args(field.type) or (field.type,)
+            allowed = kinds + (int,) if float in kinds else kinds
+            # bool is an int subclass, but `population = true` is always a mistake
+            if not isinstance(value, allowed) or (isinstance(value, bool) and bool not in kinds):
+                names = ' or '.join('None' if kind is type(None) else kind.__name__ for kind in kinds)
+                raise ValueError(f'{field.name} must be {names}, got {value!r}')
+
+        if self.population < 2:
+            raise ValueError(f'population must be at least 2, got {self.population}')
+        if not 1 <= self.mating_pool_size <= self.population:
+            raise ValueError(f'mating_pool_size must be in [1, {self.population}], got {self.mating_pool_size}')
+        if not 0 <= self.elitism <= self.mating_pool_size:
+            raise ValueError(f'elitism must be in [0, {self.mating_pool_size}], got {self.elitism}')
+        if not 0 <= self.mutation_prob <= 1:
+            raise ValueError(f'mutation_prob must be in [0, 1], got {self.mutation_prob}')
+        if self.dots_xvel <= 0:
+            raise ValueError(f'dots_xvel must be positive, got {self.dots_xvel}')
+        if self.fitness not in FITNESS_MODES:
+            raise ValueError(f'fitness must be one of {", ".join(FITNESS_MODES)}, got {self.fitness!r}')
+        if self.selection not in SELECTIONS:
+            raise ValueError(f'selection must be one of {", ".join(SELECTIONS)}, got {self.selection!r}')
+        if not 1 <= self.tournament_size <= self.population:
+            raise ValueError(f'tournament_size must be in [1, {self.population}], got {self.tournament_size}')
+        if not 1 <= self.rank_pressure <= 2:
+            raise ValueError(f'rank_pressure must be in [1, 2], got {self.rank_pressure}')
+        if self.steady_state and self.bound_cutoff:
+            raise ValueError('bound_cutoff needs whole generations, it cannot be used with steady_state')
+        if self.step_cap_factor is not None and self.step_cap_factor < 1:
+            raise ValueError(f'step_cap_factor must be at least 1, got {self.step_cap_factor}')
+
+    @classmethod
+    def field_names(cls):
+        return [field.name for field in fields(cls)]
+
+    def replace(self, **changes):
+        return replace(self, **changes)
@@ -0,0 +1,116 @@
+import hashlib
+import heapq
+import math
+import os
+import numpy as np
+from checkpoint import atomic_write
+from collision import CollisionGrid
+from config import cache_dir
+from obstacles import *
+
+FIELD_CELL = 4  # Pixels per side of a distance field cell, well under the 10px gaps of the layouts
+FIELD_VERSION = 2  # Bump when the computed distances change
+
+
+class DistanceField:
+    """Shortest path length to the goal around the obstacles, one value per cell.
+
+    Computed once per layout with Dijkstra over 8-connected cells that may
+    not cut obstacle corners. Cells inside obstacles, where dead dots end
+    up, get the distance of the nearest reachable cell plus the way out,
+    so every position can be scored with a single array lookup.
+    """
+    def __init__(self, distances, cell=FIELD_CELL):
+        self.distances = distances
+        self.cell = cell
+
+    @classmethod
+    def compute(cls, rects, goal_rect, world_size, cell=FIELD_CELL):
+        width, height = world_size
+        centers_x = np.minimum(np.arange(-(-width // cell)) * cell + cell // 2, width - 1)
+        centers_y = np.minimum(np.arange(-(-height // cell)) * cell + cell // 2, height - 1)
+        blocked = CollisionGrid(rects, world_size).blocked[centers_x[:, None] + 1, centers_y[None, :] + 1]
+        size_x, size_y = blocked.shape
+
+        # Cells within reach of the goal start from their straight distance to its centre
+        goal_x, goal_y = goal_rect.center
+        direct = np.hypot(centers_x[:, None] - goal_x, centers_y[None, :] - goal_y)
+        sources = direct <= GOAL_RADIUS + DOTS_RADIUS
+        sources[min(goal_x // cell, size_x - 1), min(goal_y // cell, size_y - 1)] = True
+        distances = np.full((size_x, size_y), np.inf)
+        distances[sources] = direct[sources]
+
+        free = (~blocked).tolist()
+        dist = distances.tolist()
+        heap = [(dist[x][y], x, y) for x, y in zip(*np.nonzero(sources))]
+        heapq.heapify(heap)
+        diagonal = cell * math.sqrt(2)
+        while heap:
+            d, x, y = heapq.heappop(heap)
+            if d > dist[x][y]:
+                continue
+            for dx in (-1, 0, 1):
+                for dy in (-1, 0, 1):
+                    u, v = x + dx, y + dy
+                    if not (0 <= u < size_x and 0 <= v < size_y) or not free[u][v] or dx == dy == 0:
+                        continue
+                    if dx and dy:
+                        if not (free[x + dx][y] and free[x][y + dy]):
+                            continue
+                        step = diagonal
+                    else:
+                        step = cell
+                    if d + step < dist[u][v]:
+                        dist[u][v] = d + step
+                        heapq.heappush(heap, (d + step, u, v))
+        distances = np.array(dist)
+
+        # Fill obstacle and unreachable cells outwards from their reachable neighbours
+        while np.isinf(distances).any():
+            padded = np.pad(distances, 1, constant_values=np.inf)
+            nearest = np.full_like(distances, np.inf)
+            for dx in (-1, 0, 1):
+                for dy in (-1, 0, 1):
+                    if dx or dy:
+                        shifted = padded[1 + dx:1 + dx + size_x, 1 + dy:1 + dy + size_y]
+                        np.minimum(nearest, shifted + (diagonal if dx and dy else cell), out=nearest)
+            filled = np.where(np.isinf(distances), nearest, distances)
+            if np.array_equal(filled, distances):
+                break
+            distances = filled
+
+        return cls(distances, cell)
+
+    def lookup(self, positions):
+        cells = np.floor(np.asarray(positions) / self.cell).astype(np.intp)
+        np.clip(cells[:, 0], 0, self.distances.shape[0] - 1, out=cells[:, 0])
+        np.clip(cells[:, 1], 0, self.distances.shape[1] - 1, out=cells[:, 1])
+        return self.distances[cells[:, 0], cells[:, 1]]
+
+
+_fields = {}
+
+
+def distance_field(obstacles, goal, world_size=(WIDTH, HEIGHT)):
+    """Distance field of a layout, from memory, the on-disk cache or computed and cached."""
+    rects = tuple(tuple(obstacle.rect) for obstacle in obstacles if not isinstance(obstacle, Goal))
+    key = (rects, tuple(goal.rect), tuple(world_size), FIELD_CELL)
+    field = _fields.get(key)
+    if field is not None:
+        return field
+
+    digest = hashlib.sha256(repr((FIELD_VERSION, key)).encode()).hexdigest()
+    cache_file = os.path.join(cache_dir(), 'fields', digest + '.npy')
+    try:
+        field = DistanceField(np.load(cache_file), FIELD_CELL)
+    except (OSError, ValueError):
+        field = DistanceField.compute(rects, goal.rect, world_size, FIELD_CELL)
+        try:
+            os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+            with atomic_write(cache_file) as f:
+                np.save(f, field.distances)
+        except OSError:
+            pass
+
+    _fields[key] = field
+    return field
@@ -1,36 +1,54 @@
-#import pygame as pg
 import random
 import math
+from array import array
+import heapq
 import pickle
 import os
+import sys
+import time
+import argparse
 from obstacles import *
-
-pg.font.init()
+from collision import collision_grid
+from metrics import MetricsLog, generation_metrics
+from checkpoint import CheckpointWriter, PickleCheckpoints, atomic_write
+from config import FITNESS_MODES, SELECTIONS, Config, new_seed
+from profiling import NULL_TIMER, PHASES, PhaseTimer
 
 class Dot:
-    VEL = pg.Vector2((DOTS_XVEL, 0))
+    VEL = (DOTS_XVEL, 0)
+    # VEL rotated by every integer angle in range(360), indexed by the angle
+    DIRECTIONS = [
+        (DOTS_XVEL * math.cos(math.radians(angle)), DOTS_XVEL * math.sin(math.radians(angle)))
+        for angle in range(360)
+    ]
     RADIUS = DOTS_RADIUS
     LIVE_COLOR = 'green'
     DEAD_COLOR = 'gray'
     ELITES_COLOR = 'blue'
 
     def __init__(self, moves=None):
-        self.position = pg.Vector2(POSITION)
-        self.directions = [] if moves is None else moves
+        self.position = POSITION
+        # Chromosome of angle indices into DIRECTIONS
+        self.directions = array('H') if moves is None else moves
         self.move_idx = 0
         self.alive = True
+        self.fitness = None  # Cached by get_fitness until the dot moves or resets
         
-    def move(self):
+    def move(self, rng=random):
         if self.move_idx < len(self.directions):
-            direction = self.directions[self.move_idx]
+            angle = self.directions[self.move_idx]
         else:
-            direction = self.VEL.rotate(random.randrange(360))
-            self.directions.append(direction)
+            angle = rng.randrange(360)
+            self.directions.append(angle)
 
-        self.position += direction
+        x, y = self.position
+        dx, dy = self.DIRECTIONS[angle]
+        self.position = (x + dx, y + dy)
         self.move_idx += 1
+        self.fitness = None
         
     def draw(self, surface, is_elite=False):
+        import pygame as pg
         if is_elite:
             pg.draw.circle(surface, self.ELITES_COLOR, self.position, self.RADIUS)
         elif self.alive:
@@ -46,36 +64,33 @@ class Dot:
         return False
         
     def get_fitness(self, goal):
+        if self.fitness is not None:
+            return self.fitness
+
         distance_to_goal = math.dist(self.position, goal.rect.center)
         distance_score = GOAL_REWARD if distance_to_goal <= GOAL_RADIUS + DOTS_RADIUS else -distance_to_goal
-        fitness = distance_score + (1 / self.move_idx)
-        return fitness
+        self.fitness = distance_score + (1 / self.move_idx)
+        return self.fitness
 
     def replicate(self):
-        return Dot(self.directions.copy())
+        return Dot(array('H', self.directions))
 
-    def mutate(self):
+    def mutate(self, rng=random):
         for i in range(len(self.directions)):
-            if random.random() < MUTATION_PROB:
-                direction = Dot.VEL.rotate(random.randrange(360))
-                self.directions[i] = direction
+            if rng.random() < MUTATION_PROB:
+                self.directions[i] = rng.randrange(360)
 
     def reset(self):
         self.move_idx = 0
-        self.position = pg.Vector2(POSITION)
+        self.position = POSITION
         self.alive = True
+        self.fitness = None
         
     @classmethod
-    def crossover(cls, parent1, parent2):
-        point = random.randrange(min(parent1.move_idx, parent2.move_idx))
-        offspring1_directions = []
-        offspring2_directions = []
-        
-        offspring1_directions.extend(parent1.directions[:point])
-        offspring1_directions.extend(parent2.directions[point:parent2.move_idx])
-        
-        offspring2_directions.extend(parent2.directions[:point])
-        offspring2_directions.extend(parent1.directions[point:parent1.move_idx])
+    def crossover(cls, parent1, parent2, rng=random):
+        point = rng.randrange(min(parent1.move_idx, parent2.move_idx))
+        offspring1_directions = parent1.directions[:point] + parent2.directions[point:parent2.move_idx]
+        offspring2_directions = parent2.directions[:point] + parent1.directions[point:parent1.move_idx]
         
         offspring1 = Dot(offspring1_directions)
         offspring2 = Dot(offspring2_directions)
@@ -84,11 +99,19 @@ class Dot:
                 
 
 class Population:
-    def __init__(self, goal, size):
+    timer = NULL_TIMER  # Replace with a profiling.PhaseTimer to time each phase
+    # Dots always start and move in the constants.py world; scenarios need ArrayPopulation
+    start = POSITION
+    world_size = (WIDTH, HEIGHT)
+
+    def __init__(self, goal, size, seed=None):
         self.goal = goal
         self.size = size
+        self.seed = new_seed() if seed is None else seed
+        self.rng = random.Random(self.seed)  # Every random draw of this population
         self.dots = []
         self.elites = []
+        self.generation = 0  # Generations completed
         self.__alive = size
 
         self.__populate()
@@ -99,52 +122,69 @@ class Population:
             self.dots.append(dot)
             
     def update(self, obstacles):
+        # Moving and collision alternate per dot, so both are timed as movement here
+        self.timer.start()
         alive = 0
+        grid = collision_grid(obstacles)
         for dot in self.dots:
             if dot.alive:
                 alive += 1
-                dot.move()
+                dot.move(self.rng)
 
                 # Kill dots on going out of window's boundary or colliding with an obstacle
-                if dot.position.x < 0 or dot.position.x > WIDTH or \
-                   dot.position.y < 0 or dot.position.y > HEIGHT or \
-                   dot.collides(obstacles):
+                if grid.collides_point(*dot.position):
                     dot.alive = False
 
         self.__alive = alive
+        self.timer.lap('movement')
         return alive
         
     def alive(self):
         return self.__alive > 0
+
+    def evaluate(self, obstacles):
+        # Same interface as ArrayPopulation.evaluate, one step at a time
+        while self.alive():
+            self.update(obstacles)
         
     def draw(self, surface):
-        for dot in self.dots:
-            if dot in self.elites:
-                dot.draw(surface, True)
-            else:
-                dot.draw(surface)
+        from render import draw_dots
+
+        elites = set(self.elites)
+        live = [dot.position for dot in self.dots if dot.alive and dot not in elites]
+        dead = [dot.position for dot in self.dots if not dot.alive and dot not in elites]
+
+        # Elites are drawn last so they stay visible on top
+        draw_dots(surface, dead, Dot.DEAD_COLOR, Dot.RADIUS)
+        draw_dots(surface, live, Dot.LIVE_COLOR, Dot.RADIUS)
+        draw_dots(surface, [dot.position for dot in self.elites], Dot.ELITES_COLOR, Dot.RADIUS)
     
     def generate_next_generation(self):
+        self.timer.start()
         new_population = []
+        reached_goal_dots = 0
+
+        # Fitness is evaluated once per dot here; selection reuses the cached values
+        for dot in self.dots:
+            if dot.get_fitness(self.goal) >= GOAL_REWARD:
+                reached_goal_dots += 1
+        self.timer.lap('fitness')
+
         best_dots = self.select_best_dots(MATING_POOL_SIZE)
         best_dot = best_dots[0]
         best_dot_moves = best_dot.move_idx
-        reached_goal_dots = 0
+        self.timer.lap('selection')
 
         for _ in range(0, self.size - ELITISM, 2):
-            parents = random.choices(best_dots, k = 2)
-            child1, child2 = Dot.crossover(*parents)
+            parents = self.rng.choices(best_dots, k = 2)
+            child1, child2 = Dot.crossover(*parents, self.rng)
             
-            child1.mutate()
-            child2.mutate()
+            child1.mutate(self.rng)
+            child2.mutate(self.rng)
             
             new_population.append(child1)
             new_population.append(child2)
         
-        for dot in self.dots:
-            if dot.get_fitness(self.goal) >= GOAL_REWARD:
-                reached_goal_dots += 1
-        
         for dot in best_dots[:ELITISM]:        
             dot.reset()
 
@@ -153,51 +193,181 @@ class Population:
         self.__alive = len(new_population)
         self.elites = best_dots[:ELITISM]
         self.dots = new_population
+        self.generation += 1
+        # Crossover and mutation alternate per pair, so both are timed as crossover here
+        self.timer.lap('crossover')
 
         return best_dot, best_dot_moves, reached_goal_dots
         
+    def get_fitness(self):
+        return [dot.get_fitness(self.goal) for dot in self.dots]
+
+    def get_moves(self):
+        return [dot.move_idx for dot in self.dots]
+
     def select_best_dots(self, n):
+        # Partial top-n selection, only the mating pool needs to be ordered
         key = lambda x: x.get_fitness(self.goal)
-        dots = sorted(self.dots, key=key, reverse=True)
-        dots = dots[:n]
-
-        return dots
+        return heapq.nlargest(n, self.dots, key=key)
         
+    def __getstate__(self):
+        # The timer belongs to the run, not the population, and may hold a live cProfile
+        state = self.__dict__.copy()
+        state.pop('timer', None)
+        return state
+
     def save(self, file):
-        with open(file, 'w+b') as f:
+        with atomic_write(file) as f:
             pickle.dump(self, f)
-            
+
     @staticmethod
     def load(file):
+        # Compact checkpoints belong to the array engine
+        if file.endswith('.npz'):
+            from array_population import ArrayPopulation
+            return ArrayPopulation.load(file)
+
         with open(file, 'r+b') as f:
             obj = pickle.load(f)
+        # Pickles of the original script hold pygame vectors and no RNG or generation counter
+        if not all(hasattr(obj, name) for name in ('seed', 'rng', 'generation')):
+            raise ValueError(f'{file} was saved by an older version and cannot be resumed')
         return obj
 
 
-if __name__ == '__main__':
-    window = pg.display.set_mode((WIDTH, HEIGHT))  # Creates the window
+# Options of `run` that set the Config field of the same name
+CONFIG_FLAGS = ('step_cap_factor', 'bound_cutoff', 'swept_collision', 'fitness', 'selection', 'tournament_size',
+                'steady_state')
+
+
+def make_population(use_array_engine, seed=None, config=None):
+    if use_array_engine:
+        from array_population import ArrayPopulation
+        return ArrayPopulation(GOAL, POPULATION, config, seed)
+    return Population(GOAL, POPULATION, seed)
+
+
+def make_run_dir(run_dir, resuming=False, start=0):
+    # An existing directory is fine as long as a new run would not mix its files with an old one's
+    os.makedirs(run_dir, exist_ok=True)
+    if not resuming and os.listdir(run_dir):
+        raise FileExistsError(f'{run_dir} already holds a run, resume it with --load or pick another --run-dir')
+
+    # Resuming from an older checkpoint would overwrite the numbered ones saved after it
+    later = sorted(int(suffix) for name in os.listdir(run_dir)
+                   if name.startswith('population_') and (suffix := name[len('population_'):]).isdigit()
+                   and int(suffix) >= start)
+    if resuming and later:
+        raise FileExistsError(f'{run_dir} already holds population_{later[-1]}, resume from the latest checkpoint '
+                              f'or pick another --run-dir')
+
+
+def finish_generation(population, i, checkpoints, metrics, row, final=False):
+    timer = population.timer
+
+    # Save population after every 10 generations, and the last one
+    if checkpoints and (i % 10 == 0 or final):
+        timer.start()
+        checkpoints.save(population, i)
+        timer.lap('checkpointing')
+
+    phase_times = timer.end_generation(i)
+    if metrics:
+        row.update({f'time_{phase}': seconds for phase, seconds in phase_times.items()})
+        metrics.append(row)
+
+
+def run_headless(population, obstacles, generations, checkpoints=None, metrics=None, start=0,
+                 publisher=None, stopping=None):
+    # GA loop without any pygame display, event pump or font usage.
+    # A live.SnapshotPublisher lets viewers attach to the running job.
+    # A stopping.StoppingPolicy may end the run before the last generation.
+    timer = population.timer
+    row = None
+
+    for i in range(start, generations):
+        timer.begin_generation(i)
+        started = time.perf_counter()
+        if publisher:
+            # Viewers need every step, so the generation is stepped instead of evaluated at once
+            while population.alive():
+                population.update(obstacles)
+                publisher.publish(population, i)
+            # The rate limit may have skipped the last steps, so the generation's end is always shown
+            publisher.publish(population, i, force=True)
+        else:
+            population.evaluate(obstacles)
+        update_seconds = time.perf_counter() - started
+
+        if metrics:
+            timer.start()
+            row = generation_metrics(population, i)
+            timer.lap('metrics')
+        stop = stopping and stopping.observe(population)
+
+        started = time.perf_counter()
+        best, best_moves, reached_goal = population.generate_next_generation()
+        if metrics:
+            row.update(update_seconds=update_seconds, reproduction_seconds=time.perf_counter() - started)
+
+        print('Generation', i, 'Best dot moves', best_moves, 'Reached Goal:', reached_goal)
+        if publisher:
+            publisher.record_generation(best_moves, reached_goal)
+        finish_generation(population, i, checkpoints, metrics, row, final=bool(stop) or i == generations - 1)
+        if stop:
+            print('Stopping:', stop)
+            break
+
+
+def run_interactive(population, obstacles, generations, checkpoints=None, metrics=None, start=0,
+                    render_every=1, fps=60, stopping=None):
+    """Evolve the population in a window.
+
+    Keys: Up/Down double or halve the steps simulated per displayed frame,
+    M toggles max speed (simulate unthrottled, show a frame every 1/fps
+    seconds). A mouse click toggles drawing the dots. Only every
+    render_every-th generation is drawn; the others run at full speed.
+    """
+    import pygame as pg
+    from render import static_background
+
+    pg.font.init()
+    window = pg.display.set_mode(population.world_size)  # Creates the window
     pg.display.set_caption('Dots Simulation')  # Sets window's caption
     clock = pg.time.Clock()  # Clock for controlling fps
     font = pg.font.SysFont('comicsans', 20)  # font for creating texts
 
-    obstacles = OBSTACLES3
-    run_dir = 'run1'
-    save_files = True
     render_objects = True
-    
-    if save_files:
-        os.makedirs(run_dir)
-        pop_file_path = os.path.join(run_dir, 'population')
-    
-    if GOAL not in obstacles:
-        obstacles.append(GOAL)
-    
-    population = Population(GOAL, POPULATION)
-    #population = Population.load('run1/population_100')
+    steps_per_frame = 1
+    max_speed = False
     reached_goal = 0
+    timer = population.timer
+    row = None
     
-    for i in range(GENERATIONS):
+    for i in range(start, generations):
+        timer.begin_generation(i)
+        update_seconds = 0
+        render_generation = i % render_every == 0
+        steps_since_frame = 0
+        next_frame = 0
+
         while population.alive():
+            started = time.perf_counter()
+            alive = population.update(obstacles)
+            update_seconds += time.perf_counter() - started
+            steps_since_frame += 1
+
+            # Frames are sampled by wall time at max speed, when nothing is drawn,
+            # and otherwise every steps_per_frame steps
+            drawing = render_objects and render_generation
+            if max_speed or not drawing:
+                if started < next_frame:
+                    continue
+            elif steps_since_frame < steps_per_frame:
+                continue
+            steps_since_frame = 0
+            next_frame = started + 1 / fps
+
             for e in pg.event.get():
                 # Handling window close event
                 if e.type == pg.QUIT:
@@ -205,17 +375,19 @@ if __name__ == '__main__':
                     quit()
                 elif e.type == pg.MOUSEBUTTONDOWN:  # Handling mouse/screen click
                     render_objects = not render_objects
-
-            alive = population.update(obstacles)
+                elif e.type == pg.KEYDOWN:  # Handling fast-forward keys
+                    if e.key == pg.K_UP:
+                        steps_per_frame *= 2
+                    elif e.key == pg.K_DOWN:
+                        steps_per_frame = max(steps_per_frame // 2, 1)
+                    elif e.key == pg.K_m:
+                        max_speed = not max_speed
             
             # If render_objects is set to true
-            if render_objects:
-                # Rendering all objects
-                window.fill('white')
-
-                for obstacle in obstacles:
-                    obstacle.draw(window)
-
+            if drawing:
+                timer.start()
+                # Rendering all objects over the cached window with obstacles
+                window.blit(static_background(obstacles, population.world_size), (0, 0))
                 population.draw(window)
 
                 gen_text = font.render('Generation: ' + str(i), 1, 'black')
@@ -226,16 +398,33 @@ if __name__ == '__main__':
 
                 reached_goal_text = font.render('Reached: ' + str(reached_goal), 1, 'black')
                 window.blit(reached_goal_text, (10, alive_text.get_height() * 2 + 10))
+
+                speed = 'max' if max_speed else 'x' + str(steps_per_frame)
+                speed_text = font.render('Speed: ' + speed, 1, 'black')
+                window.blit(speed_text, (10, alive_text.get_height() * 3 + 10))
                 
                 # Update the display
                 pg.display.flip()
-                clock.tick(60)  # Limit frames to 60 per second
-            
+                timer.lap('rendering')
+                if not max_speed:
+                    clock.tick(fps)  # Limit frames to fps per second
+
+        if metrics:
+            timer.start()
+            row = generation_metrics(population, i)
+            timer.lap('metrics')
+        stop = stopping and stopping.observe(population)
+
+        started = time.perf_counter()
         best, best_moves, reached_goal = population.generate_next_generation()
+        if metrics:
+            row.update(update_seconds=update_seconds, reproduction_seconds=time.perf_counter() - started)
+
         print('Generation', i, 'Best dot moves', best_moves, 'Reached Goal:', reached_goal)
         
-        # If render_objects is set to false
-        if not render_objects:
+        # If render_objects is set to false or this generation was not drawn
+        if not render_objects or not render_generation:
+            timer.start()
             # Rendering only texts
             window.fill('white')
             
@@ -247,7 +436,357 @@ if __name__ == '__main__':
             
             # Update the display. Frames not limited
             pg.display.flip()
-        
-        # Save population after every 10 generations
-        if save_files and i % 10 == 0:
-            population.save(f'{pop_file_path}_{i}')
+            timer.lap('rendering')
+
+        finish_generation(population, i, checkpoints, metrics, row, final=bool(stop) or i == generations - 1)
+        if stop:
+            print('Stopping:', stop)
+            break
+
+
+def main(argv=None, live_job=False):
+    # live_job marks the process --live starts, which runs the job instead of another viewer
+    parser = argparse.ArgumentParser(prog='dots', description='Dots evolution simulation')
+    subparsers = parser.add_subparsers(dest='command')
+
+    run_parser = subparsers.add_parser('run', help='evolve a population')
+    run_parser.add_argument('--headless', action='store_true',
+                            help='run without opening a window (no pygame display or fonts)')
+    run_parser.add_argument('--scenario', metavar='FILE',
+                            help='TOML or JSON scenario with the world, layout, GA settings and outputs; '
+                                 'other options override it (array engine)')
+    run_parser.add_argument('--obstacles', default='OBSTACLES3', metavar='LAYOUT',
+                            choices=[name for name in globals() if name.startswith('OBSTACLES')],
+                            help='obstacle layout from obstacles.py (default: %(default)s)')
+    run_parser.add_argument('--generations', type=int, default=GENERATIONS)
+    run_parser.add_argument('--run-dir', default='run1',
+                            help='directory for population files (default: %(default)s)')
+    run_parser.add_argument('--no-save', dest='save_files', action='store_false',
+                            help='do not save population files')
+    run_parser.add_argument('--load', help='resume from a saved population file')
+    run_parser.add_argument('--seed', type=int, help='seed for a reproducible run (default: random, printed)')
+    run_parser.add_argument('--metrics', help='per-generation metrics CSV (default: metrics.csv in the run directory)')
+    run_parser.add_argument('--dot-engine', dest='use_array_engine', action='store_false',
+                            help='use the per-Dot Population instead of the array engine')
+    run_parser.add_argument('--publish', metavar='NAME',
+                            help='publish snapshots to shared memory NAME for `dots view` (array engine)')
+    run_parser.add_argument('--live', action='store_true',
+                            help='run the simulation in a separate process and watch it in a viewer window')
+    run_parser.add_argument('--render-every', type=int, default=1, metavar='N',
+                            help='draw only every Nth generation, the rest run at full speed (default: %(default)s)')
+    run_parser.add_argument('--fps', type=int, default=60, help='target frame rate of the window (default: %(default)s)')
+    run_parser.add_argument('--timing', action='store_true',
+                            help='time each phase of the GA loop, add the times to the metrics log and print totals')
+    run_parser.add_argument('--profile-generation', type=int, metavar='N',
+                            help='run generation N under cProfile and write its stats to a .prof file')
+    run_parser.add_argument('--step-cap-factor', type=float,
+                            help='end a generation after this many times the previous best dot\'s moves')
+    run_parser.add_argument('--bound-cutoff', action='store_true',
+                            help='end a generation once no alive dot can still enter the mating pool')
+    run_parser.add_argument('--fitness', choices=FITNESS_MODES, default='euclidean',
+                            help='straight-line or around-the-obstacles distance to the goal (default: %(default)s)')
+    run_parser.add_argument('--selection', choices=SELECTIONS, default='truncation',
+                            help='how parents are drawn, see selection.py (default: %(default)s)')
+    run_parser.add_argument('--tournament-size', type=int, default=3,
+                            help='dots per tournament with --selection tournament (default: %(default)s)')
+    run_parser.add_argument('--steady-state', action='store_true',
+                            help='replace each dot as soon as it dies instead of waiting for the generation')
+    run_parser.add_argument('--swept-collision', action='store_true',
+                            help='test the whole path of each step against obstacles grown by the dot radius')
+    run_parser.add_argument('--workers', type=int, metavar='N',
+                            help='split the simulation of each generation across N processes (headless, array engine)')
+    run_parser.add_argument('--patience', type=int, metavar='N',
+                            help='stop after N generations without a better best dot or more dots at the goal')
+    run_parser.add_argument('--min-delta', type=float, default=0.0,
+                            help='smallest best fitness gain that counts as an improvement (default: %(default)s)')
+    run_parser.add_argument('--target-reached', type=float, metavar='FRACTION',
+                            help='stop once this fraction of the dots reaches the goal')
+    run_parser.add_argument('--max-seconds', type=float, help='stop after this much wall time')
+    run_parser.add_argument('--max-dot-steps', type=int, metavar='N',
+                            help='stop after the dots took N steps in total, a compute budget that ignores machine speed')
+
+    islands_parser = subparsers.add_parser('islands', help='evolve independent populations in parallel with migration')
+    islands_parser.add_argument('--islands', type=int, default=os.cpu_count(),
+                                help='number of populations, one per process (default: CPU count)')
+    islands_parser.add_argument('--migration-interval', type=int, default=10,
+                                help='generations between migrations (default: %(default)s)')
+    islands_parser.add_argument('--migrants', type=int, default=5,
+                                help='elites sent by each island per migration (default: %(default)s)')
+    islands_parser.add_argument('--topology', choices=['ring', 'full'], default='ring')
+    islands_parser.add_argument('--processes', type=int, help='worker processes (default: one per island)')
+    islands_parser.add_argument('--obstacles', default='OBSTACLES3', metavar='LAYOUT',
+                                choices=[name for name in globals() if name.startswith('OBSTACLES')],
+                                help='obstacle layout from obstacles.py (default: %(default)s)')
+    islands_parser.add_argument('--generations', type=int, default=GENERATIONS)
+    islands_parser.add_argument('--seed', type=int, help='experiment seed for a reproducible run (default: random, printed)')
+    islands_parser.add_argument('--run-dir', default='run1',
+                                help='directory for population files (default: %(default)s)')
+    islands_parser.add_argument('--no-save', dest='save_files', action='store_false',
+                                help='do not save population files')
+
+    sweep_parser = subparsers.add_parser('sweep', help='run a hyperparameter sweep in a process pool')
+    sweep_parser.add_argument('spec', help='JSON sweep spec with a "grid" or "random" section and "seeds"')
+    sweep_parser.add_argument('--out', default='sweep.csv', help='results table (default: %(default)s)')
+    sweep_parser.add_argument('--processes', type=int, help='worker processes (default: CPU count)')
+    sweep_parser.add_argument('--obstacles', default='OBSTACLES3', metavar='LAYOUT',
+                              choices=[name for name in globals() if name.startswith('OBSTACLES')],
+                              help='obstacle layout from obstacles.py (default: %(default)s)')
+    sweep_parser.add_argument('--generations', type=int, default=GENERATIONS)
+
+    bench_parser = subparsers.add_parser('bench', help='benchmark simulation, reproduction and collision')
+    bench_parser.add_argument('--engine', choices=['array', 'dots'], default='array')
+    bench_parser.add_argument('--sizes', type=int, nargs='+', default=[500, 5000, 50000],
+                              help='population sizes (default: %(default)s)')
+    bench_parser.add_argument('--layouts', nargs='+', metavar='LAYOUT',
+                              choices=[name for name in globals() if name.startswith('OBSTACLES')],
+                              help='obstacle layouts (default: all)')
+    bench_parser.add_argument('--generations', type=int, default=3, help='generations per workload (default: %(default)s)')
+    bench_parser.add_argument('--max-steps', type=int, default=300,
+                              help='step cap per generation (default: %(default)s)')
+    bench_parser.add_argument('--seed', type=int, default=0)
+    bench_parser.add_argument('--repeats', type=int, default=3,
+                              help='timed runs per workload, the best of which is reported (default: %(default)s)')
+    bench_parser.add_argument('--out', help='write results as JSON, e.g. to use as a baseline')
+    bench_parser.add_argument('--baseline', help='compare against a previous --out file')
+    bench_parser.add_argument('--tolerance', type=float, default=0.1,
+                              help='allowed slowdown relative to the baseline (default: %(default)s)')
+
+    check_parser = subparsers.add_parser('check', help='validate a scenario file and print a summary')
+    check_parser.add_argument('scenario', help='TOML or JSON scenario file')
+    check_parser.add_argument('--no-cache', dest='use_cache', action='store_false',
+                              help='parse the file even if a cached copy exists')
+
+    view_parser = subparsers.add_parser('view', help='watch a job started with --publish')
+    view_parser.add_argument('name', help='shared memory name given to --publish')
+    view_parser.add_argument('--fps', type=int, default=60)
+
+    # `python dots.py` with no arguments keeps running the interactive simulation
+    args = parser.parse_args(argv)
+    if args.command is None:
+        args = parser.parse_args(['run'])
+
+    scenario = None
+    if args.command in ('run', 'check') and args.scenario:
+        from scenario import load_scenario
+        try:
+            scenario = load_scenario(args.scenario, getattr(args, 'use_cache', True))
+        except (OSError, ValueError) as e:
+            parser.error(f'{args.scenario}: {e}')
+
+    if args.command == 'check':
+        print(scenario.summary())
+        return
+
+    if scenario:
+        # The scenario replaces the defaults, so options given on the command line still win
+        run_parser.set_defaults(obstacles=None, generations=scenario.generations, seed=scenario.seed,
+                                run_dir=scenario.run_dir, save_files=scenario.save_files,
+                                metrics=scenario.metrics,
+                                **{name: getattr(scenario.config, name) for name in CONFIG_FLAGS})
+        args = parser.parse_args(argv)
+        if not args.use_array_engine:
+            parser.error('--scenario needs the array engine')
+    if args.command == 'run' and (args.render_every < 1 or args.fps < 1):
+        parser.error('--render-every and --fps must be at least 1')
+    if args.command == 'run' and (args.publish or args.live) and not args.use_array_engine:
+        parser.error('--publish and --live need the array engine')
+    if args.command == 'run' and args.publish and not (args.headless or args.live):
+        parser.error('--publish needs --headless, or use --live to watch the run')
+    if args.command == 'run' and (args.load or not args.use_array_engine):
+        # Neither has a Config to put them in: the Dot engine uses constants.py, a checkpoint its own config
+        given = [f'--{name.replace("_", "-")}' for name in CONFIG_FLAGS
+                 if getattr(args, name) != run_parser.get_default(name)]
+        if given:
+            parser.error(f'{", ".join(given)} cannot be used with ' + ('--load' if args.load else '--dot-engine'))
+    if args.command == 'run' and args.workers is not None:
+        if args.workers < 1:
+            parser.error('--workers must be at least 1')
+        if not (args.headless and args.use_array_engine) or args.publish or args.steady_state:
+            parser.error('--workers needs --headless and the array engine, without --publish or --steady-state')
+
+    if args.command == 'view':
+        from live import run_viewer
+        run_viewer(args.name, args.fps)
+        return
+
+    if args.command == 'run' and args.live and not live_job:
+        import multiprocessing
+        from live import run_viewer
+
+        from array_population import ArrayPopulation
+        # Checked here, the job failing on its own would leave the viewer waiting for nothing
+        if args.load:
+            try:
+                loaded = Population.load(args.load)
+            except ValueError as e:
+                parser.error(str(e))
+            if not isinstance(loaded, ArrayPopulation):
+                parser.error('--live needs the array engine, the loaded population is a per-Dot Population')
+
+        # The job runs headless in its own process; closing the viewer only detaches from it
+        name = args.publish or f'dots-{os.getpid()}'
+        job_argv = list(sys.argv[1:] if argv is None else argv)
+        if args.command not in job_argv:
+            job_argv.insert(0, args.command)
+        job_argv += ['--headless'] + ([] if args.publish else ['--publish', name])
+        job = multiprocessing.Process(target=main, args=(job_argv, True))
+        job.start()
+        run_viewer(name, args.fps)
+        job.join()
+        return
+
+    if args.command == 'bench':
+        if args.repeats < 1:
+            parser.error('--repeats must be at least 1')
+        import bench
+        results = bench.run_benchmarks(args.engine, args.sizes, args.layouts or bench.LAYOUTS,
+                                       args.generations, args.max_steps, args.seed, args.repeats)
+        if args.out:
+            bench.save_results(results, args.out)
+        if args.baseline:
+            regressions = bench.compare(results, bench.load_results(args.baseline), args.tolerance)
+            for key, metric, ratio in regressions:
+                print('Regression:', key, metric, f'{ratio:.2f}x baseline')
+            if regressions:
+                raise SystemExit(1)
+        return
+
+    if scenario and args.obstacles is None:
+        obstacles = list(scenario.obstacles)
+    elif scenario:
+        obstacles = [scenario.goal] + [obstacle for obstacle in globals()[args.obstacles] if obstacle is not GOAL]
+    else:
+        obstacles = list(globals()[args.obstacles])
+        if GOAL not in obstacles:
+            obstacles.append(GOAL)
+
+    if args.command == 'sweep':
+        import json
+        from sweep import run_sweep
+        with open(args.spec) as f:
+            spec = json.load(f)
+        run_sweep(spec, obstacles, args.generations, args.out, args.processes)
+        return
+
+    if args.command == 'islands':
+        from islands import check_migration, run_islands
+        try:
+            check_migration(Config(), args.islands, args.migrants, args.topology)
+        except ValueError as e:
+            parser.error(str(e))
+
+        pop_file_path = None
+        if args.save_files:
+            try:
+                make_run_dir(args.run_dir)
+            except FileExistsError as e:
+                parser.error(str(e))
+            pop_file_path = os.path.join(args.run_dir, 'population')
+
+        run_islands(obstacles, args.generations, args.islands, args.migration_interval,
+                    args.migrants, args.topology, args.processes, pop_file_path, args.seed)
+        return
+
+    if args.load:
+        try:
+            population = Population.load(args.load)
+        except ValueError as e:
+            parser.error(str(e))
+    else:
+        try:
+            config = (scenario.config if scenario else Config()).replace(
+                **{name: getattr(args, name) for name in CONFIG_FLAGS})
+        except ValueError as e:
+            parser.error(str(e))
+        if scenario:
+            population = scenario.make_population(config, args.seed)
+        else:
+            population = make_population(args.use_array_engine, args.seed, config)
+    from array_population import ArrayPopulation
+    # The flags only pick the engine of a new population, a loaded one brings its own
+    if not isinstance(population, ArrayPopulation):
+        for flag in ('workers', 'publish'):
+            if getattr(args, flag):
+                parser.error(f'--{flag} needs the array engine, the loaded population is a per-Dot Population')
+    print('Seed', population.seed)
+    start = population.generation
+
+    checkpoints = None
+    if args.save_files:
+        # Resuming may continue in the directory the checkpoint came from
+        try:
+            make_run_dir(args.run_dir, resuming=args.load is not None, start=start)
+        except FileExistsError as e:
+            parser.error(str(e))
+        if isinstance(population, Population):
+            checkpoints = PickleCheckpoints(os.path.join(args.run_dir, 'population'))
+        else:
+            checkpoints = CheckpointWriter(os.path.join(args.run_dir, 'checkpoint.npz'))
+
+    metrics_file = args.metrics
+    if metrics_file is None and args.save_files:
+        metrics_file = os.path.join(args.run_dir, 'metrics.csv')
+    if args.timing or args.profile_generation is not None:
+        profile_file = None
+        if args.profile_generation is not None and args.save_files:
+            profile_file = os.path.join(args.run_dir, f'generation_{args.profile_generation}.prof')
+        population.timer = PhaseTimer(args.profile_generation, profile_file)
+
+    metrics = None
+    if metrics_file:
+        columns = MetricsLog.COLUMNS
+        if args.timing:
+            columns = columns + [f'time_{phase}' for phase in PHASES]
+        try:
+            metrics = MetricsLog(metrics_file, columns)
+        except OSError as e:
+            parser.error(f'cannot write metrics: {e}')
+
+    publisher = None
+    if args.publish:
+        from live import SnapshotPublisher
+        publisher = SnapshotPublisher(args.publish, population, obstacles, args.fps)
+
+    stopping = None
+    if any(value is not None for value in (args.patience, args.target_reached, args.max_seconds, args.max_dot_steps)):
+        from stopping import StoppingPolicy
+        try:
+            stopping = StoppingPolicy(args.patience, args.min_delta, args.target_reached,
+                                      args.max_seconds, args.max_dot_steps)
+        except ValueError as e:
+            parser.error(str(e))
+
+    pool = None
+    if args.workers:
+        from parallel import EvaluationPool
+        pool = EvaluationPool(population, args.workers)
+
+    try:
+        if args.headless:
+            run_headless(population, obstacles, args.generations, checkpoints, metrics, start, publisher,
+                         stopping)
+        else:
+            run_interactive(population, obstacles, args.generations, checkpoints, metrics, start,
+                            args.render_every, args.fps, stopping)
+        if stopping:
+            summary = stopping.summary()
+            print('Ran', summary['generations'], 'generations in', summary['seconds'], 's, best dot moves',
+                  summary['best_moves'], 'reached goal', summary['reached_goal'])
+            if args.save_files:
+                stopping.save_summary(os.path.join(args.run_dir, 'summary.json'), seed=population.seed)
+    finally:
+        if metrics:
+            metrics.close()
+        if checkpoints:
+            checkpoints.close()
+        if publisher:
+            publisher.close()
+        if pool:
+            pool.close()
+        if args.timing:
+            for phase, seconds in population.timer.totals.items():
+                print(f'{phase:>14} {seconds:.3f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+import multiprocessing
+import numpy as np
+from array_population import *
+
+TOPOLOGIES = ('ring', 'full')
+
+
+def evolve(population, obstacles, generations):
+    # Each island carries its own RNG, so results do not depend on the worker it lands on
+    stats = []
+
+    for _ in range(generations):
+        population.evaluate(obstacles)
+
+        _, best_moves, reached_goal = population.generate_next_generation()
+        stats.append((best_moves, reached_goal))
+
+    return population, stats
+
+
+def migrate(populations, migrants, topology='ring'):
+    emigrants = [population.emigrants(migrants) for population in populations]
+    n_islands = len(populations)
+
+    for i, population in enumerate(populations):
+        if topology == 'ring':
+            sources = [(i - 1) % n_islands]
+        else:
+            sources = [j for j in range(n_islands) if j != i]
+
+        for k, j in enumerate(sources):
+            chromosomes, lengths = emigrants[j]
+            population.immigrate(chromosomes, lengths, start=k * migrants)
+
+
+def check_migration(config, n_islands, migrants, topology='ring'):
+    if migrants > config.elitism:
+        raise ValueError(f'Cannot migrate {migrants} dots, only {config.elitism} elites are kept')
+    # Immigrants from every source island replace offspring rows, which must not run into the elites
+    sources = 1 if topology == 'ring' else n_islands - 1
+    offspring = config.population - config.elitism
+    if n_islands > 1 and sources * migrants > offspring:
+        raise ValueError(f'{sources} source islands of {migrants} migrants need {sources * migrants} rows, '
+                         f'only {offspring} offspring are replaced each generation')
+
+
+def run_islands(obstacles, generations, n_islands, migration_interval=10, migrants=5,
+                topology='ring', processes=None, pop_file_path=None, seed=None):
+    if topology not in TOPOLOGIES:
+        raise ValueError(f'Unknown topology {topology!r}, expected one of {TOPOLOGIES}')
+
+    # One experiment seed fans out into independent island seeds
+    seed = new_seed() if seed is None else seed
+    print('Seed', seed)
+    island_seeds = np.random.SeedSequence(seed).generate_state(n_islands, dtype=np.uint64)
+    populations = [ArrayPopulation(GOAL, POPULATION, seed=int(island_seed)) for island_seed in island_seeds]
+    check_migration(populations[0].config, n_islands, migrants, topology)
+
+    with multiprocessing.Pool(processes or min(n_islands, os.cpu_count())) as pool:
+        for start in range(0, generations, migration_interval):
+            epoch = min(migration_interval, generations - start)
+            results = pool.starmap(evolve, [(population, obstacles, epoch) for population in populations])
+            populations = [population for population, _ in results]
+
+            for offset in range(epoch):
+                best_moves = [stats[offset][0] for _, stats in results]
+                reached_goal = [stats[offset][1] for _, stats in results]
+                print('Generation', start + offset, 'Best dot moves', best_moves, 'Reached Goal:', reached_goal)
+
+            if n_islands > 1:
+                migrate(populations, migrants, topology)
+
+            if pop_file_path:
+                for i, population in enumerate(populations):
+                    population.save(f'{pop_file_path}_island{i}_{start + epoch - 1}.npz')
+
+    return populations
@@ -0,0 +1,181 @@
+import time
+from multiprocessing import shared_memory
+import numpy as np
+from dots import *
+
+# Header fields, stored as int64 at the start of the shared block
+SEQ, SIZE, N_RECTS, GENERATION, STEP, ALIVE, REACHED_GOAL, BEST_MOVES, FINISHED, WORLD_WIDTH, WORLD_HEIGHT = range(11)
+HEADER_FIELDS = 16
+
+
+def _layout(buffer, size, n_rects):
+    # Header, obstacle rects (x, y, width, height, is_goal), positions, alive mask, elite mask
+    header = np.ndarray((HEADER_FIELDS,), np.int64, buffer)
+    offset = header.nbytes
+    rects = np.ndarray((n_rects, 5), np.int32, buffer, offset)
+    offset += rects.nbytes
+    positions = np.ndarray((size, 2), np.float64, buffer, offset)
+    offset += positions.nbytes
+    alive = np.ndarray((size,), np.bool_, buffer, offset)
+    elites = np.ndarray((size,), np.bool_, buffer, offset + size)
+    return header, rects, positions, alive, elites
+
+
+def _block_size(size, n_rects):
+    return HEADER_FIELDS * 8 + n_rects * 5 * 4 + size * 2 * 8 + size * 2
+
+
+class SnapshotPublisher:
+    """Publishes an ArrayPopulation's state to a named shared memory block.
+
+    Snapshots are taken at most fps times per second, plus the end of every
+    generation, so a headless job pays for a few memory copies per second
+    whether or not a viewer is attached. The sequence number is odd while a snapshot is being written.
+    """
+    def __init__(self, name, population, obstacles, fps=60):
+        self.interval = 1 / fps
+        self.__next = 0
+        size = population.size
+        self.shm = shared_memory.SharedMemory(name, create=True, size=_block_size(size, len(obstacles)))
+        self.header, rects, self.positions, self.alive, self.elites = _layout(self.shm.buf, size, len(obstacles))
+
+        self.header[:] = 0
+        self.header[SIZE] = size
+        self.header[N_RECTS] = len(obstacles)
+        self.header[[WORLD_WIDTH, WORLD_HEIGHT]] = population.world_size
+        for row, obstacle in zip(rects, obstacles):
+            row[:] = (*obstacle.rect, isinstance(obstacle, Goal))
+
+    def publish(self, population, generation, force=False):
+        now = time.perf_counter()
+        if not force and now < self.__next:
+            return
+        self.__next = now + self.interval
+
+        header = self.header
+        header[SEQ] += 1
+        self.positions[:] = population.positions
+        self.alive[:] = population.alive_mask
+        self.elites[:] = False
+        self.elites[population.elites] = True
+        header[GENERATION] = generation
+        header[STEP] = population.step
+        header[ALIVE] = np.count_nonzero(population.alive_mask)
+        header[SEQ] += 1
+
+    def record_generation(self, best_moves, reached_goal):
+        self.header[BEST_MOVES] = best_moves
+        self.header[REACHED_GOAL] = reached_goal
+        self.header[SEQ] += 2  # Lets viewers notice the new stats
+
+    def close(self):
+        self.header[FINISHED] = 1
+        self.header[SEQ] += 2
+        del self.header, self.positions, self.alive, self.elites
+        self.shm.close()
+        self.shm.unlink()
+
+
+class SnapshotReader:
+    """Zero-copy view of a SnapshotPublisher's block from another process.
+
+    Closing the reader detaches from the block without affecting the job
+    that publishes it.
+    """
+    def __init__(self, name):
+        try:
+            self.shm = shared_memory.SharedMemory(name, track=False)
+        except TypeError:
+            # Before Python 3.13 attaching registers the block with this process's
+            # resource tracker, which would unlink it when the viewer exits
+            from multiprocessing import resource_tracker
+            self.shm = shared_memory.SharedMemory(name)
+            resource_tracker.unregister(self.shm._name, 'shared_memory')
+
+        header = np.ndarray((HEADER_FIELDS,), np.int64, self.shm.buf)
+        self.header, rects, self.positions, self.alive, self.elites = \
+            _layout(self.shm.buf, int(header[SIZE]), int(header[N_RECTS]))
+        self.obstacles = [
+            (Goal if is_goal else Obstacle)(x, y, width, height, 'left')
+            for x, y, width, height, is_goal in rects.tolist()
+        ]
+        self.world_size = (int(header[WORLD_WIDTH]), int(header[WORLD_HEIGHT]))
+
+    def stats(self):
+        header = self.header
+        return {
+            'generation': int(header[GENERATION]), 'step': int(header[STEP]),
+            'alive': int(header[ALIVE]), 'reached_goal': int(header[REACHED_GOAL]),
+            'best_moves': int(header[BEST_MOVES]), 'finished': bool(header[FINISHED]),
+        }
+
+    def close(self):
+        del self.header, self.positions, self.alive, self.elites
+        self.shm.close()
+
+
+def attach(name, timeout=10):
+    # The job may still be starting up, so retry until its block exists
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return SnapshotReader(name)
+        except FileNotFoundError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+
+
+def run_viewer(name, fps=60):
+    """Show a publishing job's population until the window is closed."""
+    import pygame as pg
+    from render import draw_dots, static_background
+
+    try:
+        reader = attach(name)
+    except FileNotFoundError:
+        print('No job is publishing', repr(name), '(it may have finished already)')
+        return
+
+    pg.font.init()
+    window = pg.display.set_mode(reader.world_size)
+    pg.display.set_caption(f'Dots Simulation - {name}')
+    clock = pg.time.Clock()
+    font = pg.font.SysFont('comicsans', 20)
+
+    last_seq = None
+
+    try:
+        while not any(e.type == pg.QUIT for e in pg.event.get()):
+            # Redraw only when the job has published something new
+            seq = int(reader.header[SEQ])
+            if seq == last_seq or seq % 2:
+                clock.tick(fps)
+                continue
+            last_seq = seq
+
+            stats = reader.stats()
+            alive, elites = reader.alive, reader.elites
+            others = ~elites
+
+            window.blit(static_background(reader.obstacles, reader.world_size), (0, 0))
+            draw_dots(window, reader.positions[others & ~alive], Dot.DEAD_COLOR)
+            draw_dots(window, reader.positions[others & alive], Dot.LIVE_COLOR)
+            draw_dots(window, reader.positions[elites], Dot.ELITES_COLOR)
+
+            lines = [
+                'Generation: ' + str(stats['generation']),
+                'Alive: ' + str(stats['alive']),
+                'Reached: ' + str(stats['reached_goal']),
+            ]
+            if stats['finished']:
+                lines.append('Job finished')
+            for k, line in enumerate(lines):
+                text = font.render(line, 1, 'black')
+                window.blit(text, (10, 10 + k * text.get_height()))
+
+            pg.display.flip()
+            clock.tick(fps)
+    finally:
+        reader.close()
+        pg.quit()
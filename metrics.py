@@ -0,0 +1,90 @@
+import csv
+import os
+import queue
+import threading
+import numpy as np
+from constants import GOAL_REWARD
+
+
+def generation_metrics(population, generation):
+    """Summary row for a generation that has finished moving.
+
+    Must be called before generate_next_generation, while positions and move
+    counts still describe the generation being scored.
+    """
+    fitness = np.asarray(population.get_fitness(), dtype=float)
+    moves = np.sort(np.asarray(population.get_moves()))
+    best = int(np.argmax(fitness))
+
+    # Dots still alive at each tenth of the generation's length
+    steps = np.linspace(0, moves[-1], 11).round()
+    alive_at_step = len(moves) - np.searchsorted(moves, steps, side='left')
+
+    return {
+        'generation': generation,
+        'seed': population.seed,
+        'best_fitness': float(fitness[best]),
+        'mean_fitness': float(fitness.mean()),
+        'median_fitness': float(np.median(fitness)),
+        'best_moves': int(np.asarray(population.get_moves())[best]),
+        'reached_goal': int(np.count_nonzero(fitness >= GOAL_REWARD)),
+        'max_moves': int(moves[-1]),
+        'alive_at_step': ' '.join(map(str, alive_at_step)),
+    }
+
+
+class MetricsLog:
+    """Append-only CSV log with one row per generation.
+
+    Rows are handed to a background thread that writes them through a
+    buffered file, so the GA loop never waits on disk I/O. Appending to an
+    existing log keeps its rows, which lets a resumed run continue the file.
+    """
+    COLUMNS = [
+        'generation', 'seed', 'best_fitness', 'mean_fitness', 'median_fitness', 'best_moves',
+        'reached_goal', 'max_moves', 'alive_at_step', 'update_seconds', 'reproduction_seconds',
+    ]
+
+    def __init__(self, file, columns=None):
+        self.file = file
+        self.columns = self.COLUMNS if columns is None else columns
+        self.__rows = queue.Queue()
+        self.__error = None
+        # Opened here so a bad path fails in the caller, not on the writer thread
+        self.__file = open(file, 'a', newline='')
+        self.__writer = csv.DictWriter(self.__file, self.columns, extrasaction='ignore')
+        if self.__file.tell() == 0:
+            self.__writer.writeheader()
+        self.__thread = threading.Thread(target=self.__write_rows, daemon=True)
+        self.__thread.start()
+
+    def __write_rows(self):
+        try:
+            while (row := self.__rows.get()) is not None:
+                self.__writer.writerow(row)
+                # Flush once the backlog is drained so the file stays readable while running
+                if self.__rows.empty():
+                    self.__file.flush()
+        except Exception as e:
+            # Kept for append() and close() to raise in the GA loop's thread
+            self.__error = e
+
+    def __raise_error(self):
+        if self.__error is not None:
+            raise self.__error
+
+    def append(self, row):
+        self.__raise_error()
+        self.__rows.put(row)
+
+    def close(self):
+        self.__rows.put(None)
+        self.__thread.join()
+        self.__file.close()
+        self.__raise_error()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -1,20 +1,59 @@
-import pygame as pg
+from collections import namedtuple
 from constants import *
 
+
+class Rect(namedtuple('Rect', 'x y width height')):
+    """Integer rectangle with the pg.Rect attributes the simulation needs.
+
+    Being a plain 4-tuple it can be passed to pygame drawing functions, while
+    the simulation itself never has to import pygame.
+    """
+    __slots__ = ()
+
+    def __new__(cls, x, y, width, height):
+        # Truncate like pg.Rect does
+        return super().__new__(cls, int(x), int(y), int(width), int(height))
+
+    @property
+    def left(self):
+        return self.x
+
+    @property
+    def top(self):
+        return self.y
+
+    @property
+    def right(self):
+        return self.x + self.width
+
+    @property
+    def bottom(self):
+        return self.y + self.height
+
+    @property
+    def center(self):
+        return (self.x + self.width // 2, self.y + self.height // 2)
+
+    def collidepoint(self, point):
+        x, y = point
+        return self.left <= int(x) < self.right and self.top <= int(y) < self.bottom
+
+
 class Obstacle:
     COLOR = 'black'
     def __init__(self, x, y, width, height, pos='center'):
         if pos == 'center':
             x = x - width // 2
             y = y - height // 2
-            self.rect = pg.Rect((x, y, width, height))
+            self.rect = Rect(x, y, width, height)
         elif pos == 'right':
             x = x - width
-            self.rect = pg.Rect((x, y, width, height))
+            self.rect = Rect(x, y, width, height)
         elif pos == 'left':
-            self.rect = pg.Rect((x, y, width, height))
+            self.rect = Rect(x, y, width, height)
         
     def draw(self, surface):
+        import pygame as pg
         pg.draw.rect(surface, self.COLOR, self.rect)
     
     def collides(self, dot):
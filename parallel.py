@@ -0,0 +1,141 @@
+import multiprocessing
+from multiprocessing import resource_tracker, shared_memory
+import numpy as np
+from array_population import *
+
+CHUNKS_PER_WORKER = 4  # Smaller chunks even out workers whose dots happen to live longer
+MIN_CHUNK = 1024  # Fewer dots than this per chunk are played out in the coordinator
+
+# Each worker keeps one shell population whose arrays are views of the coordinator's blocks
+_worker = None
+_attached = {}
+
+
+def _init_worker(goal, config, start, world_size):
+    global _worker
+    _worker = ArrayPopulation(goal, 1, config, 0, start, world_size)
+
+
+def _play_chunk(blocks, begin, end, step, stop, obstacles):
+    arrays = {}
+    for field, (name, shape, dtype) in blocks.items():
+        if name not in _attached:
+            _attached[name] = shared_memory.SharedMemory(name)
+        arrays[field] = np.ndarray(shape, dtype, _attached[name].buf)
+
+    population = _worker
+    population.chromosomes = arrays['chromosomes']
+    population.positions = arrays['positions']
+    population.moves = arrays['moves']
+    population.alive_mask = arrays['alive_mask']
+    population.step = step
+
+    # Blocks the coordinator replaced after growing the chromosomes
+    names = {name for name, _, _ in blocks.values()}
+    for name in [name for name in _attached if name not in names]:
+        _release(_attached.pop(name))
+
+    return len(population.play_out(arrays['rows'][begin:end], stop, obstacles, arrays['safe']))
+
+
+def _create(shape, dtype):
+    shm = shared_memory.SharedMemory(create=True, size=max(int(np.prod(shape)) * np.dtype(dtype).itemsize, 1))
+    return shm, np.ndarray(shape, dtype, shm.buf)
+
+
+def _release(shm, unlink=False):
+    if unlink:
+        shm.unlink()
+    try:
+        shm.close()
+    except BufferError:
+        pass  # Still viewed by an array somewhere, the mapping goes when that array does
+
+
+class EvaluationPool:
+    """Worker processes that share the simulation of one large ArrayPopulation.
+
+    The population's chromosomes, positions, moves and alive mask live in
+    shared memory blocks the workers attach to. Each round a worker gets a
+    slice of the alive dots and the steps to play, writes the outcome in
+    place, and sends back only how many of its dots are still alive.
+    Growing the chromosomes, termination, selection and reproduction stay
+    in the coordinator, so results are identical to a single process.
+    """
+    def __init__(self, population, processes=None):
+        self.population = population
+        self.processes = processes or os.cpu_count()
+        self.__blocks = {}  # Arrays of a fixed shape, by field
+        self.__chromosomes = []  # Chromosome arrays handed out by empty(), with their blocks
+        # Started before the workers so they share it; one of their own would unlink the blocks on exit
+        resource_tracker.ensure_running()
+        self.__pool = multiprocessing.Pool(self.processes, _init_worker,
+                                           (population.goal, population.config, population.start,
+                                            population.world_size))
+        population.pool = self
+
+    def empty(self, shape, dtype):
+        """A new array in shared memory, used by the population for its chromosomes."""
+        shm, array = _create(shape, dtype)
+        self.__chromosomes.append((shm, array))
+        return array
+
+    def __share(self, field, array):
+        # Copies array into its block unless it already is the block's view
+        if field not in self.__blocks:
+            self.__blocks[field] = _create(array.shape, array.dtype)
+        shared = self.__blocks[field][1]
+        if shared is not array:
+            shared[...] = array
+        return shared
+
+    def play_out(self, population, idx, stop, obstacles, safe):
+        """Same as population.play_out(), with idx split across the workers."""
+        # Chromosomes from before the pool existed, e.g. a resumed checkpoint's, are copied over once
+        chromosomes = population.chromosomes
+        if not any(array is chromosomes for _, array in self.__chromosomes):
+            population.chromosomes = self.empty(chromosomes.shape, chromosomes.dtype)
+            population.chromosomes[...] = chromosomes
+        # Blocks of the chromosomes the population has since replaced
+        stale = [shm for shm, array in self.__chromosomes if array is not population.chromosomes]
+        self.__chromosomes = [block for block in self.__chromosomes if block[1] is population.chromosomes]
+        for shm in stale:
+            _release(shm, unlink=True)
+        for field in ('positions', 'moves', 'alive_mask'):
+            setattr(population, field, self.__share(field, getattr(population, field)))
+
+        n_chunks = min(self.processes * CHUNKS_PER_WORKER, len(idx) // MIN_CHUNK)
+        if n_chunks <= 1:
+            return population.play_out(idx, stop, obstacles, safe)
+
+        self.__share('safe', safe)
+        if 'rows' not in self.__blocks:
+            self.__blocks['rows'] = _create((population.size,), np.intp)
+        self.__blocks['rows'][1][:len(idx)] = idx
+        blocks = {field: (shm.name, array.shape, array.dtype.str)
+                  for field, (shm, array) in [*self.__blocks.items(), ('chromosomes', self.__chromosomes[0])]}
+        bounds = np.linspace(0, len(idx), n_chunks + 1).astype(int).tolist()
+        tasks = [(blocks, begin, end, population.step, stop, obstacles) for begin, end in zip(bounds, bounds[1:])]
+        self.__pool.starmap(_play_chunk, tasks)
+
+        return idx[population.alive_mask[idx]]
+
+    def close(self):
+        # The population gets plain arrays back before the blocks go away
+        population = self.population
+        for field in ('chromosomes', 'positions', 'moves', 'alive_mask'):
+            setattr(population, field, getattr(population, field).copy())
+        population.pool = None
+
+        self.__pool.close()
+        self.__pool.join()
+        blocks = [shm for shm, _ in [*self.__blocks.values(), *self.__chromosomes]]
+        self.__blocks, self.__chromosomes = {}, []
+        for shm in blocks:
+            _release(shm, unlink=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
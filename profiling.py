@@ -0,0 +1,69 @@
+import cProfile
+import time
+from collections import defaultdict
+
+PHASES = ('movement', 'collision', 'termination', 'fitness', 'selection', 'crossover', 'mutation',
+          'rendering', 'metrics', 'checkpointing')
+
+
+class NullTimer:
+    """Timer used when profiling is off, every hook is a no-op."""
+    def start(self):
+        pass
+
+    def lap(self, phase):
+        pass
+
+    def begin_generation(self, generation):
+        pass
+
+    def end_generation(self, generation):
+        return {}
+
+
+NULL_TIMER = NullTimer()
+
+
+class PhaseTimer:
+    """Cumulative and per-generation wall time per phase of the GA loop.
+
+    Code being timed calls start() and then lap(phase) after each phase,
+    charging the time since the previous start/lap to that phase. When
+    cprofile_generation is set, that generation also runs under cProfile
+    and its stats are written to cprofile_file.
+    """
+    def __init__(self, cprofile_generation=None, cprofile_file=None):
+        self.totals = defaultdict(float)
+        self.generation = defaultdict(float)
+        self.cprofile_generation = cprofile_generation
+        self.cprofile_file = cprofile_file or f'generation_{cprofile_generation}.prof'
+        self.__last = time.perf_counter()
+        self.__cprofile = None
+
+    def start(self):
+        self.__last = time.perf_counter()
+
+    def lap(self, phase):
+        now = time.perf_counter()
+        self.generation[phase] += now - self.__last
+        self.__last = now
+
+    def begin_generation(self, generation):
+        if generation == self.cprofile_generation:
+            self.__cprofile = cProfile.Profile()
+            self.__cprofile.enable()
+
+    def end_generation(self, generation):
+        if self.__cprofile:
+            self.__cprofile.disable()
+            self.__cprofile.dump_stats(self.cprofile_file)
+            self.__cprofile = None
+
+        times = dict(self.generation)
+        for phase, seconds in times.items():
+            self.totals[phase] += seconds
+        self.generation.clear()
+        return times
+
+    def as_dict(self):
+        return {'total': dict(self.totals), 'generation': dict(self.generation)}
@@ -0,0 +1,84 @@
+from functools import lru_cache
+import numpy as np
+import pygame as pg
+from obstacles import *
+
+# Above this many dots, stamping pixels straight into the surface beats blitting sprites
+STAMP_THRESHOLD = 2000
+
+_sprites = {}
+
+
+def dot_sprite(color, radius=DOTS_RADIUS):
+    # Pre-rendered dot, created once per color and radius
+    key = (color, radius)
+    if key not in _sprites:
+        sprite = pg.Surface((2 * radius + 1, 2 * radius + 1), pg.SRCALPHA)
+        pg.draw.circle(sprite, color, (radius, radius), radius)
+        _sprites[key] = sprite.convert_alpha() if pg.display.get_surface() else sprite
+    return _sprites[key]
+
+
+@lru_cache(maxsize=8)
+def _disk_offsets(radius):
+    dx, dy = np.mgrid[-radius:radius + 1, -radius:radius + 1]
+    inside = dx ** 2 + dy ** 2 <= radius ** 2
+    return dx[inside], dy[inside]
+
+
+def _stamp_dots(surface, positions, color, radius):
+    # Write every covered pixel of every dot into the surface's pixel buffer at once
+    dx, dy = _disk_offsets(radius)
+    width, height = surface.get_size()
+    x = positions[:, 0].astype(np.int32)
+    y = positions[:, 1].astype(np.int32)
+    value = surface.map_rgb(pg.Color(color))
+
+    pixels = pg.surfarray.pixels2d(surface)
+    rows = pixels.T  # (height, width), rows are contiguous in memory
+
+    # Dots fully inside the surface index the buffer directly, the few on its
+    # edges are clipped pixel by pixel
+    inside = (x >= radius) & (x < width - radius) & (y >= radius) & (y < height - radius)
+    if rows.flags.c_contiguous:
+        flat = rows.reshape(-1)
+        flat[((y[inside] * width + x[inside])[:, None] + (dy * width + dx)).ravel()] = value
+    else:
+        rows[(y[inside, None] + dy).ravel(), (x[inside, None] + dx).ravel()] = value
+
+    xs = (x[~inside, None] + dx).ravel()
+    ys = (y[~inside, None] + dy).ravel()
+    visible = (xs >= 0) & (xs < width) & (ys >= 0) & (ys < height)
+    rows[ys[visible], xs[visible]] = value
+    del pixels, rows  # Unlocks the surface
+
+
+def draw_dots(surface, positions, color, radius=DOTS_RADIUS):
+    # All dots of one color in a single Surface.blits call, or a pixel stamp for big populations
+    if len(positions) == 0:
+        return
+
+    positions = np.asarray(positions)
+    if len(positions) > STAMP_THRESHOLD and surface.get_bytesize() in (1, 2, 4):
+        _stamp_dots(surface, positions, color, radius)
+        return
+
+    sprite = dot_sprite(color, radius)
+    topleft = (positions - radius).astype(int).tolist()
+    surface.blits([(sprite, position) for position in topleft], doreturn=False)
+
+
+@lru_cache(maxsize=8)
+def _background(obstacles, size):
+    background = pg.Surface(size)
+    background.fill('white')
+
+    for rect, color in obstacles:
+        pg.draw.rect(background, color, rect)
+
+    return background.convert() if pg.display.get_surface() else background
+
+
+def static_background(obstacles, size=(WIDTH, HEIGHT)):
+    """White window with the obstacles drawn, rendered once per layout."""
+    return _background(tuple((obstacle.rect, obstacle.COLOR) for obstacle in obstacles), size)
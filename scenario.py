@@ -0,0 +1,197 @@
+import hashlib
+import json
+import os
+import pickle
+from dataclasses import dataclass
+from array_population import *
+from checkpoint import atomic_write
+from collision import cache_grid
+from config import cache_dir
+
+SCENARIO_KEYS = {'name', 'seed', 'generations', 'world', 'goal', 'obstacles', 'ga', 'output'}
+WORLD_KEYS = {'width', 'height', 'start'}
+GOAL_KEYS = {'x', 'y', 'size', 'pos'}
+OBSTACLE_KEYS = {'x', 'y', 'width', 'height', 'pos'}
+OUTPUT_KEYS = {'run_dir', 'save', 'metrics'}
+POSITIONS = ('center', 'left', 'right')
+CACHE_VERSION = 5  # Bump when Scenario or CollisionGrid change shape
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """Everything one experiment needs, read from a TOML or JSON file.
+
+    Replaces editing constants.py and the layout/run_dir variables: every
+    field defaults to the value the simulation used before scenario files.
+    """
+    name: str
+    world_size: tuple = (WIDTH, HEIGHT)
+    start: tuple = POSITION
+    goal: Goal = GOAL
+    obstacles: tuple = ()  # Goal included, like the OBSTACLES layouts
+    config: Config = Config()
+    seed: int | None = None
+    generations: int = GENERATIONS
+    run_dir: str = 'run1'
+    save_files: bool = True
+    metrics: str | None = None
+
+    def make_population(self, config=None, seed=None):
+        config = self.config if config is None else config
+        seed = self.seed if seed is None else seed
+        return ArrayPopulation(self.goal, config.population, config, seed, self.start, self.world_size)
+
+    def summary(self):
+        width, height = self.world_size
+        return (f'{self.name}: {width}x{height} world, start {self.start}, goal at {self.goal.rect.center}, '
+                f'{len(self.obstacles) - 1} obstacles, population {self.config.population}, '
+                f'{self.generations} generations, seed {self.seed}')
+
+
+def _check_keys(table, allowed, where):
+    if not isinstance(table, dict):
+        raise ValueError(f'{where} must be a table')
+    unknown = set(table) - allowed
+    if unknown:
+        raise ValueError(f'Unknown keys in {where}: {", ".join(sorted(unknown))}')
+
+
+def _number(table, key, default, where, integer=False):
+    value = table.get(key, default)
+    kinds = int if integer else (int, float)
+    # bool is an int subclass, but `width = true` is always a mistake
+    if not isinstance(value, kinds) or isinstance(value, bool):
+        raise ValueError(f'{where}.{key} must be {"an integer" if integer else "a number"}, got {value!r}')
+    return value
+
+
+def _pos(table, where):
+    pos = table.get('pos', 'center')
+    if pos not in POSITIONS:
+        raise ValueError(f'{where}.pos must be one of {", ".join(POSITIONS)}, got {pos!r}')
+    return pos
+
+
+def _obstacle(table, where):
+    _check_keys(table, OBSTACLE_KEYS, where)
+    for key in ('x', 'y', 'width', 'height'):
+        if key not in table:
+            raise ValueError(f'{where} needs {key}')
+    width = _number(table, 'width', None, where)
+    height = _number(table, 'height', None, where)
+    if width <= 0 or height <= 0:
+        raise ValueError(f'{where} must have a positive width and height')
+    return Obstacle(_number(table, 'x', None, where), _number(table, 'y', None, where), width, height,
+                    _pos(table, where))
+
+
+def parse_scenario(data, name):
+    """Build and validate a Scenario from the tables of a scenario file."""
+    _check_keys(data, SCENARIO_KEYS, 'scenario')
+    name = data.get('name', name)
+
+    world = data.get('world', {})
+    _check_keys(world, WORLD_KEYS, 'world')
+    width = _number(world, 'width', WIDTH, 'world', integer=True)
+    height = _number(world, 'height', HEIGHT, 'world', integer=True)
+    if width <= 0 or height <= 0:
+        raise ValueError(f'world must have a positive width and height, got {width}x{height}')
+    start = world.get('start', (width // 2, height * 0.95))
+    if (not isinstance(start, (list, tuple)) or len(start) != 2
+            or not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in start)):
+        raise ValueError(f'world.start must be [x, y], got {start!r}')
+    start = tuple(start)
+
+    goal = data.get('goal', {})
+    _check_keys(goal, GOAL_KEYS, 'goal')
+    size = _number(goal, 'size', GOAL_SIZE, 'goal')
+    if size <= 0:
+        raise ValueError(f'goal.size must be positive, got {size}')
+    goal = Goal(_number(goal, 'x', width // 2, 'goal'), _number(goal, 'y', 50, 'goal'), size, size,
+                _pos(goal, 'goal'))
+
+    layout = data.get('obstacles', [])
+    if isinstance(layout, str):
+        # A built-in layout by name, e.g. "OBSTACLES3", with this scenario's goal
+        layouts = {key: value for key, value in globals().items() if key.startswith('OBSTACLES')}
+        if layout not in layouts:
+            raise ValueError(f'Unknown obstacle layout {layout!r}, expected one of {", ".join(layouts)}')
+        obstacles = [obstacle for obstacle in layouts[layout] if not isinstance(obstacle, Goal)]
+    elif isinstance(layout, list):
+        obstacles = [_obstacle(table, f'obstacles[{k}]') for k, table in enumerate(layout)]
+    else:
+        raise ValueError('obstacles must be a list of tables or the name of a built-in layout')
+    obstacles = (goal, *obstacles)
+
+    ga = data.get('ga', {})
+    _check_keys(ga, set(Config.field_names()), 'ga')
+    config = Config(**ga)
+
+    output = data.get('output', {})
+    _check_keys(output, OUTPUT_KEYS, 'output')
+    run_dir = output.get('run_dir', name)
+    save_files = output.get('save', True)
+    metrics = output.get('metrics')
+    if not isinstance(run_dir, str) or not isinstance(save_files, bool) or not isinstance(metrics, (str, type(None))):
+        raise ValueError('output.run_dir and output.metrics must be strings and output.save a boolean')
+
+    seed = data.get('seed')
+    if seed is not None:
+        seed = _number(data, 'seed', None, 'scenario', integer=True)
+    generations = _number(data, 'generations', GENERATIONS, 'scenario', integer=True)
+    if generations < 1:
+        raise ValueError(f'generations must be at least 1, got {generations}')
+
+    rect = goal.rect
+    if rect.left < 0 or rect.top < 0 or rect.right > width or rect.bottom > height:
+        raise ValueError(f'goal {tuple(rect)} lies outside the {width}x{height} world')
+    if collision_grid(obstacles, (width, height)).collides_point(*start):
+        raise ValueError(f'world.start {start} is outside the world or inside an obstacle')
+
+    return Scenario(name, (width, height), start, goal, obstacles, config, seed, generations,
+                    run_dir, save_files, metrics)
+
+
+def _read(content, path):
+    if path.endswith('.toml'):
+        import tomllib
+        return tomllib.loads(content.decode())
+    if path.endswith('.json'):
+        return json.loads(content)
+    raise ValueError(f'Scenario files must be .toml or .json, got {path}')
+
+
+def load_scenario(path, use_cache=True):
+    """Parse and validate a scenario file, or load it from the on-disk cache.
+
+    Cache entries are keyed by a hash of the file name and contents and hold
+    the scenario together with its compiled collision grid, so a large
+    layout is only parsed and rasterised the first time it is used.
+    """
+    with open(path, 'rb') as f:
+        content = f.read()
+    name = os.path.splitext(os.path.basename(path))[0]
+    key = hashlib.sha256(f'{CACHE_VERSION}:{os.path.basename(path)}:'.encode() + content).hexdigest()
+    cache_file = os.path.join(cache_dir(), 'scenarios', key + '.pickle')
+
+    if use_cache:
+        try:
+            with open(cache_file, 'rb') as f:
+                scenario, grid = pickle.load(f)
+            cache_grid(grid)
+            return scenario
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            pass
+
+    scenario = parse_scenario(_read(content, path), name)
+    grid = collision_grid(scenario.obstacles, scenario.world_size)
+
+    if use_cache:
+        try:
+            os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+            with atomic_write(cache_file) as f:
+                pickle.dump((scenario, grid), f, protocol=pickle.HIGHEST_PROTOCOL)
+        except OSError:
+            pass
+
+    return scenario
@@ -0,0 +1,49 @@
+import numpy as np
+
+# Each strategy draws n parent indices at once from the fitness of every dot.
+# pool is the mating pool, the best config.mating_pool_size dots best first.
+
+
+def truncation(fitness, pool, n, rng, config):
+    # Uniform over the mating pool, as dots.Population does with random.choices
+    return pool[rng.integers(len(pool), size=n)]
+
+
+def tournament(fitness, pool, n, rng, config):
+    contenders = rng.integers(len(fitness), size=(n, config.tournament_size))
+    return contenders[np.arange(n), fitness[contenders].argmax(axis=1)]
+
+
+def stochastic_universal(weights, n, rng):
+    # n evenly spaced pointers with one random offset over the cumulative weights
+    cumulative = np.cumsum(weights)
+    spacing = cumulative[-1] / n
+    pointers = rng.random() * spacing + spacing * np.arange(n)
+    chosen = np.searchsorted(cumulative, pointers, side='right')
+    # Pointers come out in index order, so shuffle before pairing them up
+    return rng.permutation(np.minimum(chosen, len(weights) - 1))
+
+
+def sus(fitness, pool, n, rng, config):
+    # Fitness proportional, shifted so the worst dot still has a sliver of a chance
+    weights = fitness - fitness.min()
+    weights += max(weights.max(), 1) * 1e-3
+    return stochastic_universal(weights, n, rng)
+
+
+def rank(fitness, pool, n, rng, config):
+    # Linear ranking: the best dot expects rank_pressure offspring, the worst 2 - rank_pressure
+    size = len(fitness)
+    ranks = np.empty(size)
+    ranks[np.argsort(fitness, kind='stable')] = np.arange(size)
+    pressure = config.rank_pressure
+    weights = 2 - pressure + 2 * (pressure - 1) * ranks / max(size - 1, 1)
+    return stochastic_universal(weights, n, rng)
+
+
+STRATEGIES = {
+    'truncation': truncation,
+    'tournament': tournament,
+    'sus': sus,
+    'rank': rank,
+}
@@ -0,0 +1,81 @@
+import json
+import time
+import numpy as np
+from constants import GOAL_REWARD
+
+
+class StoppingPolicy:
+    """Ends a run before its last generation once it stops paying off.
+
+    A run stops when the best fitness and goal count have not improved for
+    patience generations (improvements of min_delta or less do not count),
+    when target_reached of the dots reach the goal, or when it has used
+    max_seconds of wall time or max_dot_steps steps summed over all dots.
+    Every criterion left as None is off.
+    """
+    def __init__(self, patience=None, min_delta=0.0, target_reached=None, max_seconds=None, max_dot_steps=None):
+        if patience is not None and patience < 1:
+            raise ValueError(f'patience must be at least 1, got {patience}')
+        if target_reached is not None and not 0 < target_reached <= 1:
+            raise ValueError(f'target_reached must be a fraction in (0, 1], got {target_reached}')
+        self.patience = patience
+        self.min_delta = min_delta
+        self.target_reached = target_reached
+        self.max_seconds = max_seconds
+        self.max_dot_steps = max_dot_steps
+
+        self.started = time.perf_counter()
+        self.generations = 0
+        self.dot_steps = 0
+        self.best_fitness = -np.inf
+        self.best_moves = None
+        self.reached_goal = 0
+        self.stale = 0  # Generations since the last improvement
+        self.reason = None
+
+    def observe(self, population):
+        """Record a generation that has finished moving and return why the run should stop, or None.
+
+        Like metrics.generation_metrics, call it before generate_next_generation.
+        """
+        fitness = np.asarray(population.get_fitness(), dtype=float)
+        moves = np.asarray(population.get_moves())
+        best = int(np.argmax(fitness))
+        reached_goal = int(np.count_nonzero(fitness >= GOAL_REWARD))
+        self.generations += 1
+        self.dot_steps += int(moves.sum())
+
+        if fitness[best] > self.best_fitness + self.min_delta or reached_goal > self.reached_goal:
+            self.stale = 0
+        else:
+            self.stale += 1
+        if fitness[best] > self.best_fitness:
+            self.best_fitness = float(fitness[best])
+            self.best_moves = int(moves[best])
+        self.reached_goal = max(self.reached_goal, reached_goal)
+
+        if self.target_reached is not None and reached_goal >= self.target_reached * len(fitness):
+            self.reason = f'{reached_goal} of {len(fitness)} dots reached the goal'
+        elif self.patience is not None and self.stale >= self.patience:
+            self.reason = f'no improvement in {self.stale} generations'
+        elif self.max_seconds is not None and time.perf_counter() - self.started >= self.max_seconds:
+            self.reason = f'time budget of {self.max_seconds:g}s used'
+        elif self.max_dot_steps is not None and self.dot_steps >= self.max_dot_steps:
+            self.reason = f'budget of {self.max_dot_steps} dot steps used'
+        return self.reason
+
+    def summary(self):
+        return {
+            'generations': self.generations,
+            'stopped_by': self.reason or 'generation limit',
+            'best_fitness': self.best_fitness,
+            'best_moves': self.best_moves,
+            'reached_goal': self.reached_goal,
+            'dot_steps': self.dot_steps,
+            'seconds': round(time.perf_counter() - self.started, 3),
+        }
+
+    def save_summary(self, file, **extra):
+        with open(file, 'w') as f:
+            json.dump({**extra, **self.summary()}, f, indent=2)
+            f.write('\n')
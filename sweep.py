@@ -0,0 +1,101 @@
+import csv
+import itertools
+import json
+import multiprocessing
+import random
+import time
+from array_population import *
+from stopping import StoppingPolicy
+
+COLUMNS = Config.field_names() + [
+    'seed', 'first_goal_generation', 'best_fitness', 'mean_generation_seconds', 'generations_run', 'stopped_by',
+]
+
+
+def expand_spec(spec):
+    """Turn a sweep spec into a list of (Config, seed) runs.
+
+    A spec has either a "grid" mapping each Config field to a list of values,
+    or a "random" mapping fields to [low, high] bounds plus a "samples" count,
+    and a list of "seeds" every configuration is run with. An optional
+    "stopping" section holds StoppingPolicy arguments that end runs early.
+    """
+    seeds = spec.get('seeds', [0])
+    unknown = set(spec.get('grid', {})) | set(spec.get('random', {}))
+    unknown -= set(Config.field_names())
+    if unknown:
+        raise ValueError(f'Unknown sweep parameters: {", ".join(sorted(unknown))}')
+
+    if 'grid' in spec:
+        names = list(spec['grid'])
+        points = [dict(zip(names, values)) for values in itertools.product(*spec['grid'].values())]
+    elif 'random' in spec:
+        sampler = random.Random(spec.get('sampler_seed', 0))
+        points = []
+        for _ in range(spec.get('samples', 10)):
+            point = {}
+            for name, (low, high) in spec['random'].items():
+                if isinstance(low, int) and isinstance(high, int):
+                    point[name] = sampler.randint(low, high)
+                else:
+                    point[name] = sampler.uniform(low, high)
+            points.append(point)
+    else:
+        raise ValueError('Sweep spec needs a "grid" or "random" section')
+
+    # Building every Config up front validates the whole sweep before running it
+    return [(Config(**point), seed) for point in points for seed in seeds]
+
+
+def run_config(config, seed, obstacles, generations, stopping=None):
+    population = ArrayPopulation(GOAL, config.population, config, seed)
+    policy = StoppingPolicy(**stopping or {})
+    first_goal_generation = None
+    best_fitness = []
+    start = time.perf_counter()
+
+    for i in range(generations):
+        population.evaluate(obstacles)
+
+        best_fitness.append(round(float(population.get_fitness().max()), 3))
+        stop = policy.observe(population)
+        _, _, reached_goal = population.generate_next_generation()
+        if reached_goal and first_goal_generation is None:
+            first_goal_generation = i
+        if stop:
+            break
+
+    row = vars(config).copy()
+    row.update(
+        seed=seed,
+        first_goal_generation=first_goal_generation,
+        best_fitness=json.dumps(best_fitness),
+        mean_generation_seconds=(time.perf_counter() - start) / len(best_fitness),
+        generations_run=len(best_fitness),
+        stopped_by=policy.summary()['stopped_by'],
+    )
+    return row
+
+
+def run_sweep(spec, obstacles, generations, out_file, processes=None):
+    runs = expand_spec(spec)
+    # Checked here so a bad stopping section fails before any run starts
+    stopping = spec.get('stopping', {})
+    try:
+        StoppingPolicy(**stopping)
+    except TypeError as e:
+        raise ValueError(f'Bad sweep stopping section: {e}') from None
+    tasks = [(config, seed, obstacles, generations, stopping) for config, seed in runs]
+
+    with open(out_file, 'w', newline='') as f, multiprocessing.Pool(processes) as pool:
+        writer = csv.DictWriter(f, COLUMNS)
+        writer.writeheader()
+
+        for i, row in enumerate(pool.imap(_run_task, tasks), 1):
+            writer.writerow(row)
+            f.flush()
+            print('Run', i, 'of', len(tasks), 'First goal generation:', row['first_goal_generation'])
+
+
+def _run_task(task):
+    return run_config(*task)